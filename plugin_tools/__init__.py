@@ -3,24 +3,60 @@
 '插件工具导入。'
 
 import os
-from .device import log, get_bot_state, set_user_env
-from .app import request
+import importlib
 from .auxiliary import snake_case
-from .env import Env
+from .trace import traced
 
-with open(os.path.join(os.path.dirname(__file__), 'VERSION')) as version_file:
-    VERSION = version_file.read().strip()
+# 第一次访问时才导入的名称（`requests`、设备传输、Web应用客户端和`Env`）。
+_LAZY_ATTRIBUTES = {
+    'log': 'device',
+    'get_bot_state': 'device',
+    'set_user_env': 'device',
+    'request': 'app',
+    'Env': 'env',
+    }
+_SUBMODULES = ['app', 'async_app', 'auxiliary', 'batch', 'cache', 'device',
+               'env', 'history', 'metrics', 'mirror', 'sampler', 'scheduler',
+               'sessions', 'spatial', 'spool', 'trace', 'waypoints', 'worker']
 
-__version__ = VERSION
+def _read_version():
+    with open(os.path.join(os.path.dirname(__file__), 'VERSION')) as version_file:
+        return version_file.read().strip()
 
+def __getattr__(name):
+    '''按需导入子模块和`VERSION`（PEP 562）。'''
+    if name in ['VERSION', '__version__']:
+        value = _read_version()
+    elif name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module('.' + _LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module('.' + name, __name__)
+    else:
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name))
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_SUBMODULES)
+                  | set(['VERSION', '__version__']))
+
+_CONFIGS = {}  # {(plugin_name, schema): {config_name: value}}
+_FALSE_STRINGS = ['false', 'no', 'off', '0', '']
+
+@traced('get_config_value')
 def get_config_value(plugin_name, config_name, value_type=int,
-                     _get_state=get_bot_state):
+                     _get_state=None):
     """获取插件配置输入的值。如果找不到，请尝试使用默认值。
 
     参数:
         plugin_name (str): 插件的名称。
         config_name (str): 插件输入名称。
     """
+    from .device import log, get_bot_state
+    if _get_state is None:
+        _get_state = get_bot_state
     namespaced_config = '{}_{}'.format(snake_case(plugin_name), config_name)
 
     # 尝试分两步确定配置的默认值。
@@ -32,7 +68,9 @@ def get_config_value(plugin_name, config_name, value_type=int,
         log('Plugin manifest for `{}` not found.'.format(plugin_name), 'warn')
         return value_type(os.environ[namespaced_config])
     else:  # 找到配置数据。
-        configs = manifest['config'].values() if Env().use_v2() else manifest['config']
+        configs = manifest['config']
+        if isinstance(configs, dict):  # v2状态目录
+            configs = configs.values()
 
 
     # 步骤2。搜索配置名称。
@@ -59,5 +97,82 @@ def set_config_value(plugin_name, config_name, value):
         config_name (str): 插件输入名称。
         value: 要设置的值。
     """
+    from .device import set_user_env
     namespaced_config = '{}_{}'.format(snake_case(plugin_name), config_name)
     set_user_env(namespaced_config, value)
+
+def set_config_values(plugin_name, values):
+    """在一个命令中设置多个插件配置（使用插件的命名空间）。
+
+    参数:
+        plugin_name (str): 插件的名称。
+        values (dict): {插件输入名称: 值}
+    """
+    from .device import set_user_env
+    prefix = snake_case(plugin_name) + '_'
+    return set_user_env(dict((prefix + config_name, value)
+                             for config_name, value in values.items()))
+
+def _coerce(value, value_type):
+    '把环境变量或默认值转换为配置类型。'
+    if value is None or isinstance(value, value_type):
+        return value
+    if value_type is bool and isinstance(value, str):
+        return value.strip().lower() not in _FALSE_STRINGS
+    return value_type(value)
+
+@traced('load_config')
+def load_config(plugin_name, schema=None, reload=False,
+                _get_manifest=None):
+    """一次读取插件的所有配置输入。
+
+    插件清单只读取一次（v2只读取该插件的状态目录），
+    每个输入使用设定值（环境变量）或清单中的默认值，并转换为指定类型。
+    结果会被缓存。
+
+    参数:
+        plugin_name (str): 插件的名称。
+        schema (dict, optional): 插件输入名称 -> 类型，
+            例如 {'speed': int, 'label': str, 'enabled': bool}。
+            默认为 None（清单中的所有输入，类型由默认值决定）。
+        reload (bool, optional): 忽略缓存重新读取。默认为 False。
+    返回：
+        {插件输入名称: 值}
+    """
+    from .device import log, _get_plugin_manifest
+    if _get_manifest is None:
+        _get_manifest = _get_plugin_manifest
+    cache_key = (plugin_name, None if schema is None else tuple(
+        sorted((name, value_type) for name, value_type in schema.items())))
+    if not reload and cache_key in _CONFIGS:
+        return dict(_CONFIGS[cache_key])
+
+    manifest = _get_manifest(plugin_name)
+    if manifest is None:
+        log('Plugin manifest for `{}` not found.'.format(plugin_name), 'warn')
+        configs = []
+    else:
+        configs = manifest.get('config') or []
+        if isinstance(configs, dict):
+            configs = configs.values()
+    defaults = dict((c['name'], c.get('value')) for c in configs)
+    if schema is None:
+        schema = dict((name, str if default is None else type(default))
+                      for name, default in defaults.items())
+
+    prefix = snake_case(plugin_name) + '_'
+    config = {}
+    for config_name, value_type in schema.items():
+        value = os.environ.get(prefix + config_name)
+        if value is None:
+            if config_name not in defaults:
+                log('Config name `{}` not found.'.format(config_name), 'warn')
+                raise KeyError(prefix + config_name)
+            value = defaults[config_name]
+        config[config_name] = _coerce(value, value_type)
+    _CONFIGS[cache_key] = config
+    return dict(config)
+
+# 设置`PLUGIN_TOOLS_METRICS_DIR`时自动写入Prometheus指标文本文件。
+if os.getenv('PLUGIN_TOOLS_METRICS_DIR'):
+    importlib.import_module('.metrics', __name__).start()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：增量JSON数组解析。'''
+
+import re
+import json
+import codecs
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+# 数字后面可能还有（下一个块中的）数字、小数点或指数。
+_NUMBER_TAIL = re.compile(r'[0-9eE.+-]*\Z')
+# 在块边界处可能被截断的记录结尾：字面量或`\uXXXX`转义的开头、数字。
+_PARTIAL = re.compile(
+    r'(?:t(?:ru?)?|f(?:a(?:ls?)?)?|n(?:ul?)?|u[0-9a-fA-F]{0,4}'
+    r'|[0-9eE.+-]*)\Z')
+
+def _incomplete(error):
+    '解码错误是否只是因为数据在块边界处被截断。'
+    return error.msg.startswith('Unterminated string') \
+        or _PARTIAL.match(error.doc, error.pos) is not None
+
+def iter_json_array(chunks):
+    """从字节块中逐条产出顶层JSON数组的元素。
+
+    只保留尚未解析的部分，因此内存占用与单条记录的大小相关，
+    而不是与整个响应的大小相关。元素之间必须有`,`；
+    遇到第一个无效的标记时立即抛出ValueError，而不是读取到响应结束。
+
+    参数:
+        chunks (iterable): 字节块，例如`response.iter_content()`。
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ''
+    position = 0
+    expected = '['  # '['、'value'（值或']'）、'next_value'、',' 或 'end'
+    while True:
+        chunk = next(chunks, None)
+        final = chunk is None
+        buffer = buffer[position:] + decoder.decode(chunk or b'', final=final)
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+            character = buffer[position]
+            if expected == '[':
+                if character != '[':
+                    raise ValueError('Expected a JSON array.')
+                expected = 'value'
+                position += 1
+            elif expected == 'end':
+                raise ValueError('Unexpected data after JSON array.')
+            elif expected == ',':
+                if character not in ',]':
+                    raise ValueError(
+                        "Expected ',' or ']' at {!r}.".format(character))
+                expected = 'next_value' if character == ',' else 'end'
+                position += 1
+            elif character == ']' and expected == 'value':
+                expected = 'end'
+                position += 1
+            elif character in ',]':
+                raise ValueError('Expected a value at {!r}.'.format(character))
+            else:
+                try:
+                    record, end = _DECODER.raw_decode(buffer, position)
+                except json.JSONDecodeError as error:
+                    if final or not _incomplete(error):
+                        raise
+                    break  # 记录不完整：读取下一个块。
+                if not final and isinstance(record, (int, float)) \
+                        and not isinstance(record, bool) \
+                        and _NUMBER_TAIL.match(buffer, end):
+                    break  # 数字可能在块边界处被截断。
+                position = end
+                expected = ','
+                yield record
+        if final:
+            if expected != 'end':
+                raise ValueError('Incomplete JSON array.')
+            return
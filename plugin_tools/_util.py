@@ -15,6 +15,15 @@ ENV = Env()
 HEADER_FORMAT = '>HII'
 TIMEOUT_SECONDS = 10
 
+def _import_numpy(module_name):
+    '导入NumPy（可选依赖）；未安装时说明哪个模块需要它以及如何安装。'
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('{} requires NumPy: pip install plugin_tools[numpy]'
+                          .format(module_name))
+    return numpy
+
 def _open_socket(address):
     opened_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
     opened_socket.settimeout(TIMEOUT_SECONDS)
@@ -63,12 +72,42 @@ if ENV.use_v2() and ENV.plugin_api_available():
     RESPONSES = threading.Thread(target=RESPONSE_BUFFER.listen, daemon=True)
     RESPONSES.start()
 
+def _encode_frame(payload):
+    'Encode a request payload as a Larsen OS pipe frame.'
+    message_bytes = bytes(json.dumps(payload), 'utf-8')
+    header = struct.pack(HEADER_FORMAT, 0xFBFB, 0, len(message_bytes))
+    return header + message_bytes
+
+def _recv_exactly(connection, size):
+    'Receive exactly `size` bytes (None if the connection closed).'
+    chunks = []
+    while size > 0:
+        chunk = connection.recv(size)
+        if chunk == b'':
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def _read_frame(connection):
+    'Read one frame written with `_encode_frame` (None if the connection closed).'
+    header = _recv_exactly(connection, struct.calcsize(HEADER_FORMAT))
+    if header is None:
+        return None
+    (_, _, size) = struct.unpack(HEADER_FORMAT, header)
+    message_bytes = _recv_exactly(connection, size)
+    if message_bytes is None:
+        return None
+    return json.loads(message_bytes.decode('utf-8'))
+
 def _request_write(payload):
     'Make a request to Larsen OS.'
+    _request_write_frames([_encode_frame(payload)])
+
+def _request_write_frames(frames):
+    'Write pre-encoded request frames to Larsen OS over one connection.'
     request_socket = _open_socket(ENV.request_pipe)
-    message_bytes = bytes(json.dumps(payload), 'utf-8')
-    header = struct.pack(HEADER_FORMAT, 0xFBFB, 0, len(message_bytes))
-    request_socket.sendall(header + message_bytes)
+    request_socket.sendall(b''.join(frames))
     request_socket.close()
 
 def _response_read(rpc_uuid):
@@ -3,20 +3,30 @@
 '''插件工具：Web应用。'''
 
 from __future__ import print_function
+import os
 import sys
 import time
 import json
 import base64
-import requests
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import sessions, trace
+from .cache import ResponseCache, DEFAULT_TTLS
+from .scheduler import RequestScheduler
+from ._json_stream import iter_json_array
 from .auxiliary import Color
-from .env import Env
+from .env import Env, LARSEN_API_PREFIX
 
 COLOR = Color()
 ENV = Env()
+CACHE = ResponseCache()
+SCHEDULER = RequestScheduler()
 
-def _get_required_info():
-    '获取向Funfarm Web应用程序发送HTTP请求所需的信息。'
-    token = ENV.token
+_REQUIRED_INFO = {}
+
+def _decode_required_info(token):
+    '从API令牌中解析Web应用程序地址。'
     encoded_payload = token.split('.')[1]
     encoded_payload += '=' * (4 - len(encoded_payload) % 4)
     json_payload = base64.b64decode(encoded_payload).decode('utf-8')
@@ -24,6 +34,19 @@ def _get_required_info():
     url = 'http{}:{}/api/'.format('s' if ':443' in server else '', server)
     return {'token': token, 'url': url}
 
+def _get_required_info():
+    """获取向Funfarm Web应用程序发送HTTP请求所需的信息。
+
+    解析结果按令牌缓存；令牌环境变量更改后自动重新解析。
+    """
+    token = os.getenv(LARSEN_API_PREFIX + 'TOKEN') or ENV.token
+    info = _REQUIRED_INFO.get(token)
+    if info is None:
+        info = _decode_required_info(token)
+        _REQUIRED_INFO.clear()
+        _REQUIRED_INFO[token] = info
+    return info
+
 def _error(message):
     if ENV.plugin_api_available():
         log(message, 'error')
@@ -52,10 +75,61 @@ def _simplify_text_response(text, code):
     else:
         return '({}) {}'.format(code, simple_error_string)
 
+def _cached_response(entry, return_dict):
+    json_response = json.loads(entry['content'].decode('utf-8'))
+    if return_dict:
+        return {'json': json_response, 'status_code': 200}
+    return json_response
+
+def cache_stats():
+    """响应缓存计数器：hits、misses、revalidated、invalidations、entries。"""
+    return CACHE.stats()
+
+def configure_cache(ttls=None, default_ttl=0, enabled=True):
+    """配置响应缓存。
+
+    参数:
+        ttls (dict, optional): 终结点或资源名称 -> 缓存秒数,
+            例如 {'sequences': 60}。默认为 cache.DEFAULT_TTLS。
+        default_ttl (float, optional): 其他终结点的缓存秒数。默认为 0。
+        enabled (bool, optional): 是否使用缓存。默认为 True。
+    """
+    CACHE.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+    CACHE.default_ttl = default_ttl
+    CACHE.enabled = enabled
+    CACHE.invalidate()
+
+def scheduler_stats():
+    """请求调度计数器：requests、retries、throttled、rate。"""
+    return SCHEDULER.stats()
+
+def configure_scheduler(rate=None, burst=10, max_concurrency=8,
+                        max_retries=4, backoff=0.5, max_backoff=30):
+    """配置Web应用请求的限速、重试和并发上限。
+
+    参数:
+        rate (float, optional): 每秒最大请求数。默认为 None（不限速；
+            服务器返回429时会自动降低速率）。
+        burst (int, optional): 最大连续请求数。默认为 10。
+        max_concurrency (int, optional): 同时进行的最大请求数。默认为 8。
+        max_retries (int, optional): 最大重试次数。默认为 4。
+        backoff (float, optional): 第一次重试前的等待秒数。默认为 0.5。
+        max_backoff (float, optional): 最长等待秒数。默认为 30。
+    """
+    SCHEDULER.configure(rate, burst, max_concurrency, max_retries, backoff,
+                        max_backoff)
+
 def request(raw_method, endpoint, _id=None, payload=None, return_dict=False,
             get_info=_get_required_info):
     """向Funfarm Web应用程序发送HTTP请求。
 
+    GET（以及搜索）响应会按终结点缓存并使用`ETag`/`Last-Modified`
+    重新验证；其他方法在收到响应后使同一资源的缓存失效。
+    请求在`app.request`跟踪跨度中执行（见`trace`）。
+    请求经过`SCHEDULER`：限速、遵守`Retry-After`并在限流或暂时错误时重试。
+    相同的并发GET（以及搜索）请求只发送一次，所有调用者共享同一个解码结果；
+    同一资源的修改完成后开始的请求不会共享修改之前开始的请求。
+
     参数:
         raw_method (str): HTTP请求方法 ('POST', 'GET', etc.)
         endpoint (str): Web应用程序终结点 ('sequences', 'logs', etc.)
@@ -63,6 +137,11 @@ def request(raw_method, endpoint, _id=None, payload=None, return_dict=False,
         payload (dict, optional): 例如 {'name': 'new tool'}
     """
     method = raw_method.upper()
+    with trace.span('app.request', method=method, endpoint=endpoint):
+        return _request(method, endpoint, _id, payload, return_dict, get_info)
+
+def _request(method, endpoint, _id, payload, return_dict, get_info):
+    '`request`的实现。'
     full_endpoint = endpoint
     if _id is not None:
         full_endpoint += '/{}'.format(_id)
@@ -84,32 +163,150 @@ def request(raw_method, endpoint, _id=None, payload=None, return_dict=False,
         verbose = False
 
     url = api['url'] + full_endpoint
+    cacheable = CACHE.cacheable(method, endpoint)
+    cached = cache_key = generation = None
+    if cacheable:
+        generation = CACHE.generation(endpoint)
+        cache_key = CACHE.key(method, url, payload, api['token'])
+        fresh, cached = CACHE.lookup(cache_key)
+        if fresh:
+            if verbose:
+                print()
+                print('{} (cached)'.format(COLOR.make_bold(request_string)))
+            trace.annotate(status=200, cached=True)
+            return _cached_response(cached, return_dict)
     request_kwargs = {}
     request_kwargs['headers'] = {
         'Authorization': 'Bearer ' + api['token'],
         'content-type': 'application/json'}
+    request_kwargs['headers'].update(CACHE.validators(cached))
     if payload is not None:
         request_kwargs['json'] = payload
-    response = requests.request(method, url, **request_kwargs)
+    send_args = (method, url, request_kwargs, request_string, verbose,
+                 endpoint, cached, cache_key, generation)
+    if cacheable:  # 相同的并发请求共享一次HTTP请求（修改后不再加入）。
+        json_response, status_code = _single_flight(
+            (cache_key, generation), _send, *send_args)
+    else:
+        try:
+            json_response, status_code = _send(*send_args)
+        finally:  # 修改完成后使缓存失效：修改期间读取的响应也已过期。
+            CACHE.invalidate(endpoint)
+    trace.annotate(status=status_code)
+    if return_dict:
+        return {'json': json_response, 'status_code': status_code}
+    return json_response
+
+def _send(method, url, request_kwargs, request_string, verbose, endpoint,
+          cached, cache_key, generation):
+    '发送请求并解码响应，返回 (json_response, status_code)。'
+    response = SCHEDULER.send(sessions.request, method, url, **request_kwargs)
     status_code = response.status_code
+    if trace.current() is not None:
+        trace.annotate(bytes=len(response.content))
     colorized_status_code = COLOR.colorize_response_code(status_code)
     bold_request_string = COLOR.make_bold(request_string)
     request_details = '{}: {}'.format(colorized_status_code, bold_request_string)
     if verbose:
         print()
         print(request_details)
+    if status_code == 304 and cached is not None:
+        CACHE.revalidated(cached, endpoint)
+        return _cached_response(cached, False), 200
+    text_response = None  # 只在需要时解码文本，避免同时保存文本和JSON。
     try:
         json_response = response.json()
-        text_response = response.text
     except:
         text_response = _simplify_text_response(response.text, status_code)
         json_response = json.dumps(text_response)
+    else:
+        if cache_key is not None and status_code == 200:
+            CACHE.store(cache_key, endpoint, response, generation)
     if status_code != 200 and not verbose:
         print(request_details)
-        print(text_response)
-    if return_dict:
-        return {'json': json_response, 'status_code': status_code}
-    return json_response
+        print(response.text if text_response is None else text_response)
+    return json_response, status_code
+
+class _InFlight(object):
+    '进行中的请求。'
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+_IN_FLIGHT = {}  # {(缓存键, 资源代数): _InFlight}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+def _single_flight(key, function, *args):
+    '同一`key`同时只调用一次`function`，其他调用者等待并共享结果。'
+    with _IN_FLIGHT_LOCK:
+        call = _IN_FLIGHT.get(key)
+        leader = call is None
+        if leader:
+            call = _IN_FLIGHT[key] = _InFlight()
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+    try:
+        call.result = function(*args)
+    except BaseException as error:
+        call.error = error
+        raise
+    finally:
+        with _IN_FLIGHT_LOCK:
+            del _IN_FLIGHT[key]
+        call.done.set()
+    return call.result
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def stream(raw_method, endpoint, _id=None, payload=None,
+           get_info=_get_required_info, chunk_size=STREAM_CHUNK_SIZE):
+    """发送HTTP请求并逐条产出JSON数组响应中的记录。
+
+    响应正文按块读取和解析，不会同时在内存中保存完整的响应文本和记录列表。
+    流式请求不使用响应缓存。
+
+    参数:
+        raw_method (str): HTTP请求方法 ('POST', 'GET', etc.)
+        endpoint (str): Web应用程序终结点 ('points/search', 'logs', etc.)
+        _id (int, optional): Web应用资源ID。默认为None.
+        payload (dict, optional): 例如 {'pointer_type': 'Plant'}
+        chunk_size (int, optional): 每次读取的字节数。默认为 64 KiB。
+    """
+    method = raw_method.upper()
+    full_endpoint = endpoint
+    if _id is not None:
+        full_endpoint += '/{}'.format(_id)
+    request_string = '{} /api/{} {}'.format(
+        method, full_endpoint,
+        payload if payload is not None else '')
+    try:
+        api = get_info()
+    except:
+        print(request_string)
+        return
+    request_kwargs = {'stream': True}
+    request_kwargs['headers'] = {
+        'Authorization': 'Bearer ' + api['token'],
+        'content-type': 'application/json'}
+    if payload is not None:
+        request_kwargs['json'] = payload
+    response = SCHEDULER.send(sessions.request, method,
+                              api['url'] + full_endpoint, **request_kwargs)
+    try:
+        status_code = response.status_code
+        if status_code != 200:
+            print('{}: {}'.format(COLOR.colorize_response_code(status_code),
+                                  COLOR.make_bold(request_string)))
+            print(_simplify_text_response(response.text, status_code))
+            return
+        for record in iter_json_array(response.iter_content(chunk_size)):
+            yield record
+    finally:
+        response.close()
 
 def post(endpoint, payload, return_dict=False, get_info=_get_required_info):
     """向Funfarm Web应用程序发送Post HTTP请求。
@@ -125,12 +322,14 @@ def post(endpoint, payload, return_dict=False, get_info=_get_required_info):
         }
     return request('POST', endpoint, **kwargs)
 
-def get(endpoint, _id=None, return_dict=False, get_info=_get_required_info):
+def get(endpoint, _id=None, return_dict=False, get_info=_get_required_info,
+        payload=None):
     """向Funfarm Web应用程序发送Get HTTP请求。
 
     参数:
         endpoint (str): 应用程序终结点。
         _id (int, optional): 资源的ID。 默认为None。
+        payload (dict, optional): 默认为None。
     """
     kwargs = {
         '_id': _id,
@@ -219,6 +418,24 @@ def search_points(search_payload, get_info=_get_required_info):
     """
     return post('points/search', payload=search_payload, get_info=get_info)
 
+def iter_search_points(search_payload, get_info=_get_required_info):
+    """逐条产出`search_points`的结果（流式解析，适用于大量点）。
+
+    参数:
+        search_payload (dict): 例如, {'pointer_type': 'Plant'}
+    """
+    return stream('POST', 'points/search', payload=search_payload,
+                  get_info=get_info)
+
+def iter_search_logs(search_payload, get_info=_get_required_info):
+    """逐条产出`search_logs`的结果（流式解析，适用于导出大量日志）。
+
+    参数:
+        search_payload (dict): 例如, {'type': 'warn'}
+    """
+    return stream('GET', 'logs/search', payload=search_payload,
+                  get_info=get_info)
+
 def download_plants(get_info=_get_required_info):
     """从Web应用程序获取作物数据。"""
     search_payload = {'pointer_type': 'Plant'}
@@ -266,24 +483,239 @@ def add_plant(x, y, get_info=_get_required_info, **kwargs):
             new_plant[key] = value
     return post('points', payload=new_plant, get_info=get_info)
 
-def find_sequence_by_name(name, get_info=_get_required_info):
-    """查找给定序列名的序列ID。
+BULK_WORKERS = 8
+
+def _bulk_item(method, endpoint, _id, payload, get_info):
+    try:
+        result = request(method, endpoint, _id=_id, payload=payload,
+                         return_dict=True, get_info=get_info)
+    except Exception as exception:
+        return {'json': None, 'status_code': 0, 'error': repr(exception)}
+    status_code = result['status_code']
+    result['error'] = None if 200 <= status_code < 300 else result['json']
+    return result
+
+def bulk_request(method, endpoint, ids=None, payloads=None,
+                 workers=BULK_WORKERS, chunk_size=None,
+                 get_info=_get_required_info):
+    """使用有限的线程池并发发送多个请求（共享连接池）。
 
     参数:
-        name (str): 序列名称。
+        method (str): HTTP请求方法 ('POST', 'PATCH', 'DELETE', etc.)
+        endpoint (str): 应用程序终结点。
+        ids (list, optional): 每个请求的资源ID。
+        payloads (list, optional): 每个请求的有效负载。
+        workers (int, optional): 最大并发请求数。默认为 8。
+            超过`sessions.POOL_MAXSIZE`时请先调用`sessions.configure`。
+        chunk_size (int, optional): 服务器接受数组有效负载时，
+            每个请求发送的有效负载数量（只用于集合终结点的POST，
+            不能与`ids`同时使用）。默认为 None（每项一个请求）。
+    返回：
+        按输入顺序的结果列表：
+        [{'json': ..., 'status_code': 200, 'error': None}, ...]
     """
-    sequences = get('sequences', get_info=get_info)
-    if not isinstance(sequences, list):
-        _error('Error retrieving sequences.')
-        sequences = []
-    sequence_lookup = {s['name']: s['id'] for s in sequences}
+    if ids is not None and payloads is not None and len(ids) != len(payloads):
+        raise ValueError('{} ids but {} payloads.'.format(
+            len(ids), len(payloads)))
+    if chunk_size is not None and (method.upper() != 'POST'
+                                   or ids is not None):
+        raise ValueError('chunk_size only applies to collection POSTs.')
+    count = len(ids if ids is not None else payloads)
+    ids = [None] * count if ids is None else list(ids)
+    payloads = [None] * count if payloads is None else list(payloads)
+    if chunk_size is not None and chunk_size > 1:
+        chunks = [payloads[i:i + chunk_size]
+                  for i in range(0, count, chunk_size)]
+        chunk_results = bulk_request(method, endpoint, payloads=chunks,
+                                     workers=workers, get_info=get_info)
+        results = []
+        for chunk, result in zip(chunks, chunk_results):
+            items = result['json']
+            split = isinstance(items, list) and len(items) == len(chunk)
+            for number in range(len(chunk)):
+                item_result = dict(result)
+                if split:
+                    item_result['json'] = items[number]
+                results.append(item_result)
+        return results
+    def _send(item):
+        return _bulk_item(method, endpoint, item[0], item[1], get_info)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(_send, zip(ids, payloads)))
+
+def post_many(endpoint, payloads, workers=BULK_WORKERS, chunk_size=None,
+              get_info=_get_required_info):
+    """并发发送多个Post请求。参数和返回值同`bulk_request`。"""
+    return bulk_request('POST', endpoint, payloads=payloads, workers=workers,
+                        chunk_size=chunk_size, get_info=get_info)
+
+def update_many(endpoint, updates, method='PATCH', workers=BULK_WORKERS,
+                get_info=_get_required_info):
+    """并发更新多个资源。
+
+    参数:
+        endpoint (str): 应用程序终结点。
+        updates (dict): {资源ID: 有效负载}
+        method (str, optional): 'PATCH' 或 'PUT'。默认为 'PATCH'。
+    """
+    ids = list(updates)
+    return bulk_request(method, endpoint, ids=ids,
+                        payloads=[updates[_id] for _id in ids],
+                        workers=workers, get_info=get_info)
+
+def delete_many(endpoint, ids, workers=BULK_WORKERS,
+                get_info=_get_required_info):
+    """并发删除多个资源。
+
+    参数:
+        endpoint (str): 应用程序终结点，例如 'points'。
+        ids (list): 资源ID。
+    """
+    return bulk_request('DELETE', endpoint, ids=ids, workers=workers,
+                        get_info=get_info)
+
+def add_plants(plants, workers=BULK_WORKERS, chunk_size=None,
+               get_info=_get_required_info):
+    """在花园地图上添加多个植物。
+
+    参数:
+        plants (list): 例如, [{'x': 10, 'y': 20, 'planting_slug': 'mint'}]
+            键同`add_plant`。
+    """
+    new_plants = []
+    for plant in plants:
+        new_plant = {'pointer_type': 'Plant'}
+        for key, value in plant.items():
+            if value is not None:
+                new_plant[key] = value
+        new_plants.append(new_plant)
+    return post_many('points', new_plants, workers=workers,
+                     chunk_size=chunk_size, get_info=get_info)
+
+def _decode_name(name):
     try:
-        uname = name.decode('utf-8')
+        return name.decode('utf-8')
     except (UnicodeEncodeError, AttributeError):
-        uname = name
+        return name
+
+class SequenceIndex(object):
+    """Web应用序列名称和ID的本地索引。
+
+    首次查找时加载；名称未找到或索引超过`max_age`秒时增量刷新
+    （刷新时用条件GET重新验证缓存的序列列表）。
+    重名的序列与之前一样按名称返回列表中最后一个的ID。
+    """
+
+    def __init__(self, get_info=_get_required_info, max_age=60):
+        self.get_info = get_info
+        self.max_age = max_age
+        self.loaded_at = None
+        self._names = {}  # {id: name}
+        self._ids = {}  # {name: id}（重名时为列表中最后一个）
+        self._lower = {}  # {小写名称: [id, ...]}
+        self._sorted = None  # 排序的小写名称（用于前缀查找）
+
+    def _add(self, _id, name):
+        self._names[_id] = name
+        self._lower.setdefault(name.lower(), []).append(_id)
+
+    def _remove(self, _id):
+        name = self._names.pop(_id)
+        same = self._lower[name.lower()]
+        same.remove(_id)
+        if not same:
+            del self._lower[name.lower()]
+
+    def refresh(self):
+        """下载序列列表并只应用新增、删除和重命名的序列。"""
+        CACHE.expire('sequences')
+        sequences = get('sequences', get_info=self.get_info)
+        if not isinstance(sequences, list):
+            _error('Error retrieving sequences.')
+            return
+        current = {s['id']: s['name'] for s in sequences}
+        for _id in [i for i in self._names if current.get(i) != self._names[i]]:
+            self._remove(_id)
+        for _id, name in current.items():
+            if _id not in self._names:
+                self._add(_id, name)
+        self._ids = {s['name']: s['id'] for s in sequences}
+        self._sorted = None
+        self.loaded_at = time.time()
+
+    def _load(self):
+        '需要时加载或刷新索引。返回是否已刷新。'
+        if self.loaded_at is None or time.time() - self.loaded_at > self.max_age:
+            self.refresh()
+            return True
+        return False
+
+    def by_name(self, name):
+        """按名称查找序列ID（未找到时刷新一次），找不到时返回None。"""
+        name = _decode_name(name)
+        if not self._load() and name not in self._ids:
+            self.refresh()
+        return self._ids.get(name)
+
+    def by_id(self, _id):
+        """按ID查找序列名称（未找到时刷新一次），找不到时返回None。"""
+        if not self._load() and _id not in self._names:
+            self.refresh()
+        return self._names.get(_id)
+
+    def find(self, name, ignore_case=True, prefix=False):
+        """查找匹配的序列。
+
+        参数:
+            name (str): 序列名称或名称前缀。
+            ignore_case (bool, optional): 忽略大小写。默认为 True。
+            prefix (bool, optional): 按名称前缀匹配。默认为 False。
+        返回：
+            [{'name': name, 'id': id}, ...]
+        """
+        self._load()
+        name = _decode_name(name)
+        lower = name.lower()
+        if prefix:
+            if self._sorted is None:
+                self._sorted = sorted(self._lower)
+            ids = []
+            for key in self._sorted[bisect.bisect_left(self._sorted, lower):]:
+                if not key.startswith(lower):
+                    break
+                ids.extend(self._lower[key])
+        else:
+            ids = list(self._lower.get(lower, []))
+        found = [{'name': self._names[i], 'id': i} for i in ids]
+        if not ignore_case:
+            found = [f for f in found if f['name'].startswith(name)
+                     and (prefix or f['name'] == name)]
+        return found
+
+_SEQUENCE_INDEXES = {}
+
+def get_sequence_index(get_info=_get_required_info):
+    """获取当前账户的序列索引（每个进程只加载一次）。"""
     try:
-        sequence_id = sequence_lookup[uname]
-    except KeyError:
+        api = get_info()
+        key = (api['url'], api['token'])
+    except Exception:
+        key = None
+    if key not in _SEQUENCE_INDEXES:
+        _SEQUENCE_INDEXES[key] = SequenceIndex(get_info)
+    index = _SEQUENCE_INDEXES[key]
+    index.get_info = get_info
+    return index
+
+def find_sequence_by_name(name, get_info=_get_required_info):
+    """查找给定序列名的序列ID。
+
+    参数:
+        name (str): 序列名称。
+    """
+    uname = _decode_name(name)
+    sequence_id = get_sequence_index(get_info).by_name(uname)
+    if sequence_id is None:
         _error(u'Sequence `{}` not found.'.format(uname))
     else:
         return sequence_id
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：Web应用（asyncio）。
+
+与`app`相同的函数和返回值，请求在线程池中执行，
+因此可以在同一个事件循环中与其他I/O（例如设备RPC）重叠。
+'''
+
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from . import app
+
+CONCURRENCY = 8
+
+_LOCK = threading.Lock()
+_POOL = {'limit': CONCURRENCY, 'executor': None}
+_SEMAPHORES = weakref.WeakKeyDictionary()  # {事件循环: asyncio.Semaphore}
+
+def set_concurrency(limit):
+    """设置同时进行的Web应用请求的最大数量。
+
+    参数:
+        limit (int): 最大并发请求数。默认为 8。
+    """
+    with _LOCK:
+        _POOL['limit'] = limit
+        if _POOL['executor'] is not None:
+            _POOL['executor'].shutdown(wait=False)
+            _POOL['executor'] = None
+        _SEMAPHORES.clear()
+
+def _executor():
+    with _LOCK:
+        if _POOL['executor'] is None:
+            _POOL['executor'] = ThreadPoolExecutor(max_workers=_POOL['limit'])
+        return _POOL['executor']
+
+def _semaphore(loop):
+    with _LOCK:
+        semaphore = _SEMAPHORES.get(loop)
+        if semaphore is None:
+            semaphore = _SEMAPHORES[loop] = asyncio.Semaphore(_POOL['limit'])
+        return semaphore
+
+async def _run(function, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    async with _semaphore(loop):
+        return await loop.run_in_executor(
+            _executor(), functools.partial(function, *args, **kwargs))
+
+async def request(raw_method, endpoint, _id=None, payload=None,
+                  return_dict=False, get_info=app._get_required_info):
+    """向Funfarm Web应用程序发送HTTP请求（参数同`app.request`）。"""
+    return await _run(app.request, raw_method, endpoint, _id=_id,
+                      payload=payload, return_dict=return_dict,
+                      get_info=get_info)
+
+async def post(endpoint, payload, return_dict=False,
+               get_info=app._get_required_info):
+    """发送Post HTTP请求（参数同`app.post`）。"""
+    return await request('POST', endpoint, payload=payload,
+                         return_dict=return_dict, get_info=get_info)
+
+async def get(endpoint, _id=None, return_dict=False,
+              get_info=app._get_required_info, payload=None):
+    """发送Get HTTP请求（参数同`app.get`）。"""
+    return await request('GET', endpoint, _id=_id, payload=payload,
+                         return_dict=return_dict, get_info=get_info)
+
+async def patch(endpoint, _id=None, payload=None, return_dict=False,
+                get_info=app._get_required_info):
+    """发送Patch HTTP请求（参数同`app.patch`）。"""
+    return await request('PATCH', endpoint, _id=_id, payload=payload,
+                         return_dict=return_dict, get_info=get_info)
+
+async def put(endpoint, _id=None, payload=None, return_dict=False,
+              get_info=app._get_required_info):
+    """发送Put HTTP请求（参数同`app.put`）。"""
+    return await request('PUT', endpoint, _id=_id, payload=payload,
+                         return_dict=return_dict, get_info=get_info)
+
+async def delete(endpoint, _id=None, return_dict=False,
+                 get_info=app._get_required_info):
+    """发送Delete HTTP请求（参数同`app.delete`）。"""
+    return await request('DELETE', endpoint, _id=_id,
+                         return_dict=return_dict, get_info=get_info)
+
+async def search_points(search_payload, get_info=app._get_required_info):
+    """使用关键词获取过滤后的点（参数同`app.search_points`）。"""
+    return await post('points/search', payload=search_payload,
+                      get_info=get_info)
+
+async def log(message, message_type='info', get_info=app._get_required_info):
+    """将日志消息发布到Web应用程序（参数同`app.log`）。"""
+    payload = {'message': message, 'type': message_type}
+    return await post('logs', payload=payload, get_info=get_info)
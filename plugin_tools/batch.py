@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：批量Celery脚本命令构建（需要NumPy）。'''
+
+from __future__ import print_function
+import uuid
+from ._util import (_encode_frame, _request_write_frames, _response_read,
+                    _import_numpy)
+from .device import (ENV, rpc_wrapper, send_celery_script,
+                     _cs_error, _on_error)
+
+np = _import_numpy(__name__)
+MAX_COORDINATE = 100000  # 毫米：超出时一定是错误的值（例如单位错误）
+
+def _arrays(*values):
+    '将标量或序列广播为等长的一维数组。'
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v)) for v in values])
+    return [np.ravel(array) for array in arrays]
+
+def _check_range(kind, values, low, high):
+    '向量化检查整数参数范围（与`range(low, high + 1)`相同）。'
+    values_ok = (values >= low) & (values <= high) & (values == np.floor(values))
+    return _check_values(kind, values, values_ok)
+
+def _check_in(kind, values, accepted):
+    '向量化检查参数是否为允许的值之一。'
+    return _check_values(kind, values, np.isin(values, accepted))
+
+def _check_values(kind, values, values_ok):
+    if not values_ok.all():
+        _cs_error(kind, values[np.argmin(values_ok)])
+        _on_error()
+        return False
+    return True
+
+def _check_coordinates(kind, xyz):
+    '坐标必须是有限的数值，绝对值不超过`MAX_COORDINATE`。'
+    values_ok = np.isfinite(xyz) & (np.abs(xyz) <= MAX_COORDINATE)
+    return _check_values(kind, xyz.ravel(), values_ok.ravel())
+
+def _integers(values):
+    '四舍五入为Python整数列表（与`device`命令使用的整数坐标相同）。'
+    return np.rint(values).astype(np.int64).tolist()
+
+def _coordinate_nodes(xyz):
+    return [{'kind': 'coordinate', 'args': {'x': x, 'y': y, 'z': z}}
+            for x, y, z in _integers(xyz)]
+
+def assemble_coordinates(coordinates):
+    """从N×3坐标数组组装celery脚本的坐标节点列表。
+
+    坐标四舍五入为整数；包含NaN或超出范围的值时出错（返回None）。
+
+    参数:
+        coordinates (numpy.ndarray or list): 例如, [[0, 0, 0], [10, 20, 0]]
+    """
+    xyz = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+    if _check_coordinates('coordinate', xyz):
+        return _coordinate_nodes(xyz)
+
+def move_absolute_commands(locations, speed=100, offsets=(0, 0, 0)):
+    """构建`move_absolute`命令列表。
+
+    参数:
+        locations (numpy.ndarray or list): N×3位置坐标。
+        speed (int or array): 最大速度的百分比（1到100）。
+        offsets (numpy.ndarray or list, optional): 3或N×3偏移坐标。
+    """
+    kind = 'move_absolute'
+    locations = np.asarray(locations, dtype=float).reshape(-1, 3)
+    offsets = np.broadcast_to(np.asarray(offsets, dtype=float), locations.shape)
+    speeds = np.broadcast_to(np.asarray(speed), (len(locations),))
+    if _check_coordinates(kind, locations) and \
+            _check_coordinates(kind, offsets) and \
+            _check_range(kind, speeds, 1, 100):
+        return [{'kind': kind, 'args': {
+            'location': location, 'speed': speed_, 'offset': offset}}
+                for location, speed_, offset in zip(
+                    _coordinate_nodes(locations), speeds.tolist(),
+                    _coordinate_nodes(offsets))]
+
+def move_relative_commands(distances, speed=100):
+    """构建`move_relative`命令列表。
+
+    参数:
+        distances (numpy.ndarray or list): N×3距离。
+        speed (int or array): 最大速度的百分比（1到100）。
+    """
+    kind = 'move_relative'
+    distances = np.asarray(distances, dtype=float).reshape(-1, 3)
+    x, y, z, speeds = _arrays(distances[:, 0], distances[:, 1],
+                              distances[:, 2], speed)
+    if _check_coordinates(kind, distances) and \
+            _check_range(kind, speeds, 1, 100):
+        return [{'kind': kind, 'args': {
+            'x': x_, 'y': y_, 'z': z_, 'speed': speed_}}
+                for x_, y_, z_, speed_ in zip(
+                    _integers(x), _integers(y), _integers(z), speeds.tolist())]
+
+def write_pin_commands(pin_numbers, pin_values, pin_modes=0):
+    """构建`write_pin`命令列表。
+
+    参数:
+        pin_numbers (int or array): Arduino pin （0到69）。
+        pin_values (int or array): 写入pin的值。
+        pin_modes (int or array): 0（数字）或1（模拟）。
+    """
+    kind = 'write_pin'
+    pins, values, modes = _arrays(pin_numbers, pin_values, pin_modes)
+    if _check_range(kind, pins, 0, 69) and _check_in(kind, modes, [0, 1]):
+        return [{'kind': kind, 'args': {
+            'pin_number': pin, 'pin_value': value, 'pin_mode': mode}}
+                for pin, value, mode in zip(
+                    pins.tolist(), values.tolist(), modes.tolist())]
+
+def read_pin_commands(pin_numbers, labels='---', pin_modes=0):
+    """构建`read_pin`命令列表。
+
+    参数:
+        pin_numbers (int or array): Arduino pin （0到69）。
+        labels (str or list): 字符串。
+        pin_modes (int or array): 0（数字）或1（模拟）。
+    """
+    kind = 'read_pin'
+    pins, labels, modes = _arrays(pin_numbers, labels, pin_modes)
+    if _check_range(kind, pins, 0, 69) and _check_in(kind, modes, [0, 1]):
+        return [{'kind': kind, 'args': {
+            'pin_number': pin, 'label': label, 'pin_mode': mode}}
+                for pin, label, mode in zip(
+                    pins.tolist(), labels.tolist(), modes.tolist())]
+
+def set_servo_angle_commands(pin_numbers, pin_values):
+    """构建`set_servo_angle`命令列表。
+
+    参数:
+        pin_numbers (int or array): Arduino伺服pin （4、5、6或11）。
+        pin_values (int or array): 伺服角度（0到180）。
+    """
+    kind = 'set_servo_angle'
+    pins, values = _arrays(pin_numbers, pin_values)
+    if _check_in(kind, pins, [4, 5, 6, 11]) and \
+            _check_range(kind, values, 0, 180):
+        return [{'kind': kind, 'args': {'pin_number': pin, 'pin_value': value}}
+                for pin, value in zip(pins.tolist(), values.tolist())]
+
+def encode_frames(commands):
+    """将命令包装为`rpc_request`并预编码为插件API（v2）帧。
+
+    返回：
+        [(rpc_id, frame_bytes), ...]
+    """
+    batch_id = str(uuid.uuid4())
+    frames = []
+    for number, command in enumerate(commands):
+        rpc_id = '{}-{}'.format(batch_id, number)
+        frames.append((rpc_id, _encode_frame(rpc_wrapper(command, rpc_id))))
+    return frames
+
+def send_commands(commands):
+    """发送命令列表。
+
+    插件API（v2）可用时，所有帧通过一个连接写入，然后依次收集响应。
+
+    参数:
+        commands (list): Celery 脚本命令，例如`write_pin_commands`的结果。
+    """
+    if commands is None:
+        return
+    if not ENV.capabilities.v2_api:
+        return [send_celery_script(command) for command in commands]
+    frames = encode_frames(commands)
+    _request_write_frames([frame for _, frame in frames])
+    return [_response_read(rpc_id) for rpc_id, _ in frames]
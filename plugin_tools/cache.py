@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：Web应用响应缓存（TTL和条件GET）。'''
+
+import json
+import time
+import threading
+from collections import OrderedDict
+
+DEFAULT_TTLS = {
+    'sequences': 30,
+    'tools': 30,
+    'device': 60,
+    }
+MAX_ENTRIES = 256
+SAFE_METHODS = ['GET', 'HEAD']
+
+def resource_name(endpoint):
+    '终结点所属的资源，例如 `points/search` -> `points`。'
+    return endpoint.strip('/').split('/')[0]
+
+class ResponseCache(object):
+    '''按终结点TTL缓存响应，过期后使用`ETag`/`Last-Modified`重新验证。
+
+    每个资源有一个代数，失效时加一；在失效之前开始的请求的响应不会保存。
+    '''
+
+    def __init__(self, ttls=None, default_ttl=0, max_entries=MAX_ENTRIES):
+        """
+        参数:
+            ttls (dict, optional): 终结点或资源名称 -> 缓存秒数。
+                默认为 DEFAULT_TTLS。
+            default_ttl (float, optional): 其他终结点的缓存秒数。默认为 0
+                （每次都重新验证）。
+            max_entries (int, optional): 最大缓存条目数。默认为 256。
+        """
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.enabled = True
+        self.counts = {'hits': 0, 'misses': 0, 'revalidated': 0,
+                       'invalidations': 0}
+        self._entries = OrderedDict()
+        self._epoch = 0  # invalidate()（全部）时加一
+        self._generations = {}  # {资源: 代数}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cacheable(method, endpoint):
+        '''安全方法以及（POST）搜索终结点的响应可以缓存。
+
+        POST搜索结果只按TTL缓存：非安全方法的条件请求失败时返回412而不是304。
+        '''
+        return method in SAFE_METHODS or endpoint.endswith('/search')
+
+    @staticmethod
+    def key(method, url, payload, token):
+        '缓存键。'
+        return (method, url, json.dumps(payload, sort_keys=True), token)
+
+    def ttl(self, endpoint):
+        '终结点的缓存秒数。'
+        if endpoint in self.ttls:
+            return self.ttls[endpoint]
+        return self.ttls.get(resource_name(endpoint), self.default_ttl)
+
+    def _count(self, name):
+        self.counts[name] += 1
+
+    def generation(self, endpoint):
+        '资源的当前代数（请求开始前获取，传给`store`）。'
+        with self._lock:
+            return self._epoch, self._generations.get(
+                resource_name(endpoint), 0)
+
+    def lookup(self, key):
+        """查找缓存条目。
+
+        返回：
+            (fresh, entry): `fresh`为True时可以直接使用`entry['content']`；
+            否则`entry`（可能为None）的验证头应随请求发送。
+        """
+        if not self.enabled:
+            return False, None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires'] > time.time():
+                self._entries.move_to_end(key)
+                self._count('hits')
+                return True, entry
+            self._count('misses')
+            return False, entry
+
+    @staticmethod
+    def validators(entry):
+        '条件请求头。'
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get('etag') is not None:
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified') is not None:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, key, endpoint, response, generation=None):
+        """保存200响应（没有TTL也没有验证头时不保存）。
+
+        参数:
+            generation (tuple, optional): 请求开始时的`generation(endpoint)`。
+                资源在请求期间失效时不保存（响应可能是修改之前的数据）。
+        """
+        if not self.enabled:
+            return
+        if key[0] in SAFE_METHODS:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+        else:  # POST搜索：只按TTL缓存，不发送条件请求头
+            etag = last_modified = None
+        ttl = self.ttl(endpoint)
+        if ttl <= 0 and etag is None and last_modified is None:
+            return
+        resource = resource_name(endpoint)
+        with self._lock:
+            if generation is not None and generation != (
+                    self._epoch, self._generations.get(resource, 0)):
+                return
+            self._entries[key] = {
+                'resource': resource,
+                'content': response.content,
+                'etag': etag,
+                'last_modified': last_modified,
+                'expires': time.time() + ttl,
+                }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def revalidated(self, entry, endpoint):
+        '服务器返回304：延长条目的有效期。'
+        with self._lock:
+            entry['expires'] = time.time() + self.ttl(endpoint)
+            self._count('revalidated')
+
+    def expire(self, endpoint):
+        '把资源的缓存条目标记为过期：保留验证头，下次请求时重新验证。'
+        with self._lock:
+            resource = resource_name(endpoint)
+            for entry in self._entries.values():
+                if entry['resource'] == resource:
+                    entry['expires'] = 0
+
+    def invalidate(self, endpoint=None):
+        '删除资源（或全部）的缓存条目，并开始新的代数。'
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+                self._epoch += 1
+                self._generations.clear()
+            else:
+                resource = resource_name(endpoint)
+                self._generations[resource] = self._generations.get(
+                    resource, 0) + 1
+                for key in [k for k, e in self._entries.items()
+                            if e['resource'] == resource]:
+                    del self._entries[key]
+            self._count('invalidations')
+
+    def stats(self):
+        '缓存计数器。'
+        with self._lock:
+            stats = dict(self.counts)
+            stats['entries'] = len(self._entries)
+        return stats
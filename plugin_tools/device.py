@@ -5,15 +5,17 @@
 from __future__ import print_function
 import os
 import sys
+import time
 import uuid
 from functools import wraps
-import requests
+from . import sessions, trace
 from ._util import _request_write, _response_read
 from .auxiliary import Color
 from .env import Env
 
 COLOR = Color()
 ENV = Env()
+CAPABILITIES = ENV.capabilities
 ALLOWED_AXIS_VALUES = ['x', 'y', 'z', 'all']
 ALLOWED_MESSAGE_TYPES = [
     'success', 'busy', 'warn', 'error', 'info', 'fun', 'debug']
@@ -65,7 +67,7 @@ def _device_request(method, endpoint, payload=None):
         request_kwargs['json'] = payload
         response_error_log = payload.get(
             'args', {}).get('label') == RESPONSE_ERROR_LOG_UUID
-    response = requests.request(method, url, **request_kwargs)
+    response = sessions.request(method, url, **request_kwargs)
     if response.status_code != 200 and not response_error_log:
         log('{} request `{}` error ({})'.format(
             endpoint, payload or '', response.status_code), 'error',
@@ -81,18 +83,27 @@ def _device_request_v2(payload):
     rpc_uuid = payload.get('args', {}).get('label')
     return _response_read(rpc_uuid)
 
-def _device_state_fetch_v2():
-    '从设备插件api（v2）获取信息。'
-    if ENV.bot_state_dir is None:
-        return
+def _crawl_state(path):
+    '读取状态目录（或单个状态文件）。'
+    if os.path.isdir(path):
+        return {n: _crawl_state(os.path.join(path, n)) for n in os.listdir(path)}
+    with open(path, 'r') as value_file:
+        value = value_file.read()
+        return value if value != '' else None
 
-    def _crawl(path):
-        if os.path.isdir(path):
-            return {n: _crawl(os.path.join(path, n)) for n in os.listdir(path)}
-        with open(path, 'r') as value_file:
-            value = value_file.read()
-            return value if value != '' else None
-    return _crawl(ENV.bot_state_dir)
+def _device_state_fetch_v2(*keys):
+    """从设备插件api（v2）获取信息。
+
+    参数:
+        *keys (str, optional): 只读取状态的这一部分，例如 'pins'。
+    """
+    if CAPABILITIES.state_dir is None:
+        return
+    path = os.path.join(CAPABILITIES.state_dir, *keys)
+    if keys and not os.path.exists(path):
+        return {}
+    with trace.span('device.state_read', path='/'.join(keys)):
+        return _crawl_state(path)
 
 def _post(endpoint, payload):
     """将有效负载发布到设备插件API。
@@ -105,9 +116,7 @@ def _post(endpoint, payload):
     返回：
         请求响应对象
     """
-    if ENV.use_v2():
-        return _device_request_v2(payload)
-    return _device_request('POST', endpoint, payload)
+    return _TRANSPORT['post'](endpoint, payload)
 
 def _get(endpoint):
     """从设备插件API获取信息。
@@ -119,10 +128,32 @@ def _get(endpoint):
     返回：
         请求响应对象
     """
-    if ENV.use_v2():
-        return _device_state_fetch_v2()
-    return _device_request('GET', endpoint)
-
+    return _TRANSPORT['get'](endpoint)
+
+def _device_state_fetch(endpoint):
+    '从设备插件API（v1）获取状态。'
+    with trace.span('device.state_read', path=''):
+        return _device_request('GET', endpoint)
+
+# 按API版本预先选择的传输函数。
+_TRANSPORTS = {
+    'v1': {
+        'post': lambda endpoint, payload: _device_request(
+            'POST', endpoint, payload),
+        'get': _device_state_fetch,
+        'state': lambda response: response.json(),
+        'response': lambda response: {},
+        },
+    'v2': {
+        'post': lambda endpoint, payload: _device_request_v2(payload),
+        'get': lambda endpoint: _device_state_fetch_v2(),
+        'state': lambda state: state,
+        'response': lambda response: response,
+        },
+    }
+_TRANSPORT = _TRANSPORTS['v2' if CAPABILITIES.v2 else 'v1']
+
+@trace.traced('device.get_bot_state')
 def get_bot_state():
     """获取设备状态。"""
     bot_state = _get('bot/state')
@@ -130,7 +161,7 @@ def get_bot_state():
         _error('Device info could not be retrieved.')
         _on_error()
         return {}
-    return bot_state if ENV.use_v2() else bot_state.json()
+    return _TRANSPORT['state'](bot_state)
 
 def _send(function):
     @wraps(function)
@@ -145,21 +176,34 @@ def _send(function):
 def send_celery_script(command, rpc_id=None):
     """发送Celery脚本命令。"""
     kind, args, body = _check_celery_script(command)
-    temp_no_rpc_kinds = ['read_pin', 'write_pin', 'set_pin_io_mode', 'update_plugin']
-    no_rpc = kind in temp_no_rpc_kinds and not ENV.lsos_at_least(7, 0, 1)
-    if kind == 'rpc_request' or no_rpc:
+    with trace.span('device.send_celery_script', kind=kind):
+        return _send_celery_script(command, kind, args, body, rpc_id)
+
+def _send_celery_script(command, kind, args, body, rpc_id):
+    '`send_celery_script`的实现。'
+    if kind == 'rpc_request' or kind in CAPABILITIES.no_rpc_kinds:
         rpc = command
     else:
         rpc = rpc_wrapper(command, rpc_id=rpc_id)
     response = _post('celery_script', rpc)
     if response is None:
         print(COLOR.colorize_celery_script(kind, args, body))
+    if trace.current() is not None:
+        trace.annotate(outcome=_rpc_outcome(response))
     return {
         'command': command,
         'sent': rpc,
-        'response': response if ENV.use_v2() else {}
+        'response': _TRANSPORT['response'](response)
         }
 
+def _rpc_outcome(response):
+    '命令结果：rpc_ok、rpc_error、HTTP状态码或 offline。'
+    if response is None:
+        return 'offline'
+    if isinstance(response, dict):
+        return response.get('kind', 'sent')
+    return getattr(response, 'status_code', 'sent')
+
 def log(message, message_type='info', channels=None, rpc_id=None):
     """发送'发送消息'命令以将日志发布到Web应用程序。
 
@@ -518,16 +562,26 @@ def set_servo_angle(pin_number, pin_value):
         return _assemble(kind, {'pin_number': pin_number,
                                 'pin_value': pin_value})
 
+_NO_VALUE = object()
+
 @_send
-def set_user_env(key, value):
+def set_user_env(key, value=_NO_VALUE):
     """发送命令：设置用户环境变量。
 
     参数:
-        key (str): 键
-        value (str): 值
+        key (str or dict): 键，或 {键: 值}（在一个命令中设置多个变量）
+        value (str): 值（`key`为字符串时必需）
     """
     kind = 'set_user_env'
-    body = [assemble_pair(key, str(value))]
+    if isinstance(key, dict):
+        pairs = key.items()
+    elif value is _NO_VALUE:
+        _cs_error(kind, key)
+        _on_error()
+        return
+    else:
+        pairs = [(key, value)]
+    body = [assemble_pair(k, str(v)) for k, v in pairs]
     return _assemble(kind, {}, body)
 
 @_send
@@ -639,6 +693,79 @@ def get_current_position(axis='all', _get_bot_state=get_bot_state):
             except KeyError:
                 _error('Position unknown.')
 
+def _get_pin_state():
+    '只读取设备状态的pins部分。'
+    if CAPABILITIES.v2:
+        pins = _device_state_fetch_v2('pins')
+        if pins is None:
+            _error('Device info could not be retrieved.')
+            _on_error()
+            return {}
+        return pins
+    return get_bot_state().get('pins', {})
+
+def _get_plugin_manifest(plugin_name):
+    '只读取设备状态中一个插件的清单（找不到时返回None）。'
+    if CAPABILITIES.v2:
+        manifest = _device_state_fetch_v2('process_info', 'plugins', plugin_name)
+        if manifest is None:
+            _error('Device info could not be retrieved.')
+            _on_error()
+        return manifest or None
+    plugins = get_bot_state().get('process_info', {}).get('plugins', {})
+    return plugins.get(plugin_name)
+
+def get_pin_values(pin_numbers, _get_pins=_get_pin_state):
+    """通过一次状态读取获取多个pin的值。
+
+    参数:
+        pin_numbers (list): Arduino pin （0到69）。
+    返回：
+        {'timestamp': 读取时间, 'values': {pin_number: value}}
+    """
+    timestamp = time.time()
+    pins = _get_pins()
+    values = {}
+    for pin_number in pin_numbers:
+        try:
+            values[pin_number] = pins[str(pin_number)]['value']
+        except (KeyError, TypeError):
+            values[pin_number] = None
+    unknown = [str(pin) for pin, value in values.items() if value is None]
+    if unknown:
+        _error('Pin `{}` value unknown.'.format(', '.join(unknown)))
+    return {'timestamp': timestamp, 'values': values}
+
+def read_pins(pin_numbers, pin_mode=0, label='---', _get_pins=_get_pin_state):
+    """在一个RPC中读取多个pin，等待一次完成后获取所有值。
+
+    参数:
+        pin_numbers (list): Arduino pin （0到69）。
+        pin_mode (int, optional): 0（数字）或1（模拟）。默认为 0。
+        label (str, optional): 字符串。默认为 '---'。
+    返回：
+        {'timestamp': 读取时间, 'values': {pin_number: value}}
+    """
+    kind = 'read_pin'
+    args_ok = _check_arg(kind, pin_mode, [0, 1])
+    for pin_number in pin_numbers:
+        args_ok = args_ok and _check_arg(kind, pin_number, range(0, 70))
+    if not args_ok:
+        return
+    commands = [_assemble(kind, {'pin_number': pin_number,
+                                 'label': label,
+                                 'pin_mode': pin_mode})
+                for pin_number in pin_numbers]
+    if CAPABILITIES.multi_command_rpc:
+        send_celery_script({
+            'kind': 'rpc_request',
+            'args': {'label': str(uuid.uuid4())},
+            'body': commands})
+    else:
+        for command in commands:
+            send_celery_script(command)
+    return get_pin_values(pin_numbers, _get_pins=_get_pins)
+
 def get_pin_value(pin_number, _get_bot_state=get_bot_state):
     """从pin获取值。
 
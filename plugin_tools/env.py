@@ -14,10 +14,30 @@ IMAGES_DIR = os.getenv(LARSEN_OS_PREFIX + 'IMAGES_DIR')
 LEGACY_IMAGES_DIR = os.getenv('IMAGES_DIR')
 LSOS_VERSION = os.getenv(LARSEN_OS_PREFIX + 'VERSION', '0')
 BOT_STATE_DIR = os.getenv(LARSEN_OS_PREFIX + 'STATE_DIR')
+PLUGIN_DATA_DIR = os.getenv(LARSEN_OS_PREFIX + 'PLUGIN_DATA_DIR')
 # Larsen API 环境变量
 LARSEN_API_PREFIX = 'LARSEN_API_'
 TOKEN = os.getenv(LARSEN_API_PREFIX + 'TOKEN')
 LEGACY_TOKEN = os.getenv('API_TOKEN')
+# LSOS 7.0.1之前，这些命令不能包装在'rpc_request'中。
+NO_RPC_KINDS = ['read_pin', 'write_pin', 'set_pin_io_mode', 'update_plugin']
+
+_VERSION_PARTS = {}  # {版本字符串: [major, minor, patch]}
+
+class Capabilities(object):
+    '''由LSOS版本确定的功能（见`Env.capabilities`）。'''
+
+    def __init__(self, env):
+        self.lsos_version = env.lsos_version
+        # 插件API v2（管道和状态目录）
+        self.v2 = env.lsos_at_least(8)
+        self.v2_api = self.v2 and env.request_pipe is not None \
+            and env.response_pipe is not None
+        self.state_dir = env.bot_state_dir if self.v2 else None
+        # 一个'rpc_request'中的多个命令
+        self.multi_command_rpc = env.lsos_at_least(7, 0, 1)
+        self.no_rpc_kinds = frozenset(
+            [] if self.multi_command_rpc else NO_RPC_KINDS)
 
 class Env(object):
     '插件环境变量。'
@@ -28,13 +48,27 @@ class Env(object):
         self.images_dir = IMAGES_DIR or LEGACY_IMAGES_DIR
         self.lsos_version = LSOS_VERSION
         self.bot_state_dir = BOT_STATE_DIR
+        self.plugin_data_dir = PLUGIN_DATA_DIR
         self.token = TOKEN or LEGACY_TOKEN
+        self._capabilities = None
 
     @staticmethod
     def get_version_parts(version_string):
         '从版本字符串中获取major、minor和patch.'
-        major_minor_patch = version_string.lower().strip('v').split('-')[0]
-        return [int(part) for part in major_minor_patch.split('.')]
+        parts = _VERSION_PARTS.get(version_string)
+        if parts is None:
+            major_minor_patch = version_string.lower().strip('v').split('-')[0]
+            parts = [int(part) for part in major_minor_patch.split('.')]
+            _VERSION_PARTS[version_string] = parts
+        return list(parts)
+
+    @property
+    def capabilities(self):
+        '功能只在第一次使用时（或`lsos_version`更改后）计算。'
+        capabilities = self._capabilities
+        if capabilities is None or capabilities.lsos_version != self.lsos_version:
+            capabilities = self._capabilities = Capabilities(self)
+        return capabilities
 
     def lsos_at_least(self, major, minor=None, patch=None):
         '确定当前LSOS版本是否满足版本要求。'
@@ -49,12 +83,17 @@ class Env(object):
                 # 没有其他可比较部分。版本相同。
                 return True
 
+    def plugin_data_path(self, filename):
+        '插件数据目录（未设置时为当前目录）中的文件路径。'
+        return os.path.join(self.plugin_data_dir or os.getcwd(), filename)
+
     def use_v2(self):
         'Determine if the v2 API should be used.'
-        return self.lsos_at_least(8)
+        return self.capabilities.v2
 
     def plugin_api_available(self):
         '确定插件API是否可用。'
-        if self.use_v2():
-            return self.request_pipe is not None and self.response_pipe is not None
+        capabilities = self.capabilities
+        if capabilities.v2:
+            return capabilities.v2_api
         return os.getenv('PLUGIN_URL') is not None and self.token is not None
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：持久化传感器历史记录（内存映射文件，需要NumPy）。'''
+
+from __future__ import print_function
+import os
+from .env import Env
+from ._util import _import_numpy
+
+np = _import_numpy(__name__)
+ENV = Env()
+MAGIC = b'PTSH0001'
+RECORD_DTYPE = np.dtype([('timestamp', '<f8'), ('pin', '<i4'), ('value', '<f8')])
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('capacity', '<i8'),
+                         ('max_records', '<i8'), ('start', '<i8'),
+                         ('count', '<i8')])
+HEADER_SIZE = 64
+DEFAULT_FILENAME = 'sensor_history.bin'
+
+class SensorHistory(object):
+    '''固定记录（timestamp, pin, value）的内存映射存储。
+
+    记录按时间顺序连续存放在文件中。达到`max_records`后丢弃最早的记录；
+    写到文件末尾时把保留的记录移到开头（每`max_records`次添加一次），
+    因此添加是均摊O(1)，查询结果始终是连续的零拷贝视图。
+    '''
+
+    def __init__(self, path=None, max_records=1000000):
+        """
+        参数:
+            path (str, optional): 文件路径。默认为插件数据目录中的
+                `sensor_history.bin`。
+            max_records (int, optional): 保留的最大记录数。
+                打开已有文件时使用文件中保存的值。
+        """
+        self.path = path or ENV.plugin_data_path(DEFAULT_FILENAME)
+        if not os.path.exists(self.path):
+            self._create(max_records)
+        self._header = np.memmap(
+            self.path, dtype=HEADER_DTYPE, mode='r+', shape=(1,))
+        if self._header['magic'][0] != MAGIC:
+            raise ValueError('{} is not a sensor history file.'.format(
+                self.path))
+        self.capacity = int(self._header['capacity'][0])
+        self.max_records = int(self._header['max_records'][0])
+        self._records = np.memmap(
+            self.path, dtype=RECORD_DTYPE, mode='r+',
+            offset=HEADER_SIZE, shape=(self.capacity,))
+
+    def _create(self, max_records):
+        capacity = 2 * max_records
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(self.path, 'wb') as history_file:
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header['magic'] = MAGIC
+            header['capacity'] = capacity
+            header['max_records'] = max_records
+            history_file.write(header.tobytes().ljust(HEADER_SIZE, b'\0'))
+            history_file.truncate(HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+
+    @property
+    def _start(self):
+        return int(self._header['start'][0])
+
+    def __len__(self):
+        return int(self._header['count'][0])
+
+    def _set(self, start, count):
+        self._header['start'] = start
+        self._header['count'] = count
+
+    def _make_room(self, size):
+        '在末尾留出`size`条记录的空间，必要时丢弃最早的记录并压缩。'
+        start, count = self._start, len(self)
+        drop = max(0, count + size - self.max_records)
+        start, count = start + min(drop, count), count - min(drop, count)
+        if start + count + size > self.capacity:
+            self._records[:count] = self._records[start:start + count]
+            start = 0
+        self._set(start, count)
+        return start + count
+
+    def append(self, timestamp, pin, value):
+        '''添加一条记录。时间戳不能早于最后一条记录。'''
+        self.extend([timestamp], [pin], [value])
+
+    def extend(self, timestamps, pins, values):
+        """批量添加记录（例如`Sampler.buffer.window()`的结果）。
+
+        参数:
+            timestamps (array): 非递减的时间戳。
+            pins (int or array): pin 编号。
+            values (array): 值。
+        """
+        timestamps, pins, values = np.broadcast_arrays(
+            np.asarray(timestamps, dtype=float), pins, values)
+        timestamps = timestamps[-self.max_records:]
+        size = len(timestamps)
+        if size == 0:
+            return
+        last = self.last_timestamp()
+        if np.any(np.diff(timestamps) < 0) or \
+                (last is not None and timestamps[0] < last):
+            raise ValueError('Sensor history timestamps must not decrease.')
+        end = self._make_room(size)
+        new = self._records[end:end + size]
+        new['timestamp'] = timestamps
+        new['pin'] = pins[-size:]
+        new['value'] = values[-size:]
+        self._header['count'] = len(self) + size
+
+    def last_timestamp(self):
+        '''最后一条记录的时间戳（没有记录时为None）。'''
+        if len(self) == 0:
+            return None
+        return float(self._records['timestamp'][self._start + len(self) - 1])
+
+    def records(self):
+        '''所有保留的记录（零拷贝视图）。'''
+        return self._records[self._start:self._start + len(self)]
+
+    def query(self, start_time=None, end_time=None, pin=None):
+        """获取时间范围 [start_time, end_time) 内的记录。
+
+        不指定`pin`时返回零拷贝视图。视图在下一次添加记录之前有效，
+        需要长期保存时请使用`.copy()`。
+
+        参数:
+            start_time (float, optional): 开始时间戳。默认为最早的记录。
+            end_time (float, optional): 结束时间戳。默认为最新的记录之后。
+            pin (int, optional): 只返回该pin的记录（副本）。
+        """
+        records = self.records()
+        timestamps = records['timestamp']
+        first = 0 if start_time is None else \
+            np.searchsorted(timestamps, start_time, side='left')
+        last = len(records) if end_time is None else \
+            np.searchsorted(timestamps, end_time, side='left')
+        selected = records[first:last]
+        if pin is not None:
+            return selected[selected['pin'] == pin]
+        return selected
+
+    def flush(self):
+        '''将更改写入磁盘。'''
+        self._records.flush()
+        self._header.flush()
+
+    def close(self):
+        '''写入磁盘并释放文件映射。'''
+        self.flush()
+        del self._records
+        del self._header
@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：Prometheus文本格式指标（node_exporter textfile收集器）。
+
+    from plugin_tools import metrics
+    metrics.start('/var/lib/node_exporter/textfile')
+
+设置环境变量`PLUGIN_TOOLS_METRICS_DIR`为目录时，导入`plugin_tools`时自动开始。
+指标来自跟踪跨度（RPC、Web应用请求、状态读取）以及响应缓存和请求调度计数器。
+'''
+
+import os
+import sys
+import atexit
+import tempfile
+import threading
+from . import trace
+
+METRICS_VARIABLE = 'PLUGIN_TOOLS_METRICS_DIR'
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5,
+                   5, 10)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n')
+
+def _format_labels(names, values, extra=''):
+    pairs = ['{}="{}"'.format(name, _escape(value))
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{{{}}}'.format(','.join(pairs)) if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter(object):
+    '''按标签计数的计数器。'''
+
+    kind = 'counter'
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        '''增加计数。'''
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        '''当前计数。'''
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        '''(名称后缀, 标签值, 额外标签, 值) 列表。'''
+        with self._lock:
+            return [('', key, '', value)
+                    for key, value in sorted(self._values.items())]
+
+class Histogram(object):
+    '''按标签统计的延迟直方图（秒）。'''
+
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        '''记录一个观测值。'''
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            counts, total = self._values.get(
+                key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels):
+        '''观测次数。'''
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            return sum(self._values.get(key, ([0], 0))[0])
+
+    def samples(self):
+        '''(名称后缀, 标签值, 额外标签, 值) 列表。'''
+        with self._lock:
+            values = [(key, list(counts), total)
+                      for key, (counts, total) in sorted(self._values.items())]
+        samples = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append(('_bucket', key, 'le="{}"'.format(
+                    _format_value(bound)), cumulative))
+            samples.append(('_sum', key, '', total))
+            samples.append(('_count', key, '', cumulative))
+        return samples
+
+class Registry(object):
+    '''指标集合，以Prometheus文本格式输出。'''
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, description, labels=()):
+        '''注册并返回计数器。'''
+        metric = Counter(name, description, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        '''注册并返回直方图。'''
+        metric = Histogram(name, description, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """注册在输出时调用的函数`collector()`。
+
+        返回 [(名称, 类型, 说明, 标签名称, [(标签值, 值), ...]), ...]
+        """
+        self.collectors.append(collector)
+
+    def render(self):
+        '''Prometheus文本格式。'''
+        lines = []
+        for metric in self.metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append('# HELP {} {}'.format(metric.name, metric.description))
+            lines.append('# TYPE {} {}'.format(metric.name, metric.kind))
+            for suffix, key, extra, value in samples:
+                lines.append('{}{}{} {}'.format(
+                    metric.name, suffix,
+                    _format_labels(metric.labels, key, extra),
+                    _format_value(value)))
+        for collector in self.collectors:
+            for name, kind, description, labels, values in collector():
+                lines.append('# HELP {} {}'.format(name, description))
+                lines.append('# TYPE {} {}'.format(name, kind))
+                for key, value in values:
+                    lines.append('{}{} {}'.format(
+                        name, _format_labels(labels, key),
+                        _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        '''原子地写入文本文件（临时文件 + 重命名），收集器不会读到半个文件。'''
+        directory = os.path.dirname(os.path.abspath(path))
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=directory, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w') as metrics_file:
+                metrics_file.write(self.render())
+            os.chmod(temporary_path, 0o644)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+REGISTRY = Registry()
+RPCS = REGISTRY.counter(
+    'plugin_tools_rpc_total', 'Celery script commands sent to the device.',
+    ['kind', 'outcome'])
+RPC_SECONDS = REGISTRY.histogram(
+    'plugin_tools_rpc_seconds', 'Celery script command latency.', ['kind'])
+APP_REQUESTS = REGISTRY.counter(
+    'plugin_tools_app_requests_total', 'Web app requests.',
+    ['method', 'endpoint', 'status'])
+APP_REQUEST_SECONDS = REGISTRY.histogram(
+    'plugin_tools_app_request_seconds', 'Web app request latency.',
+    ['method', 'endpoint'])
+STATE_READS = REGISTRY.counter(
+    'plugin_tools_state_reads_total', 'Device state reads.', ['outcome'])
+STATE_READ_SECONDS = REGISTRY.histogram(
+    'plugin_tools_state_read_seconds', 'Device state read latency.')
+
+def record_span(span):
+    '''把一个结束的跟踪跨度计入指标（跟踪监听器）。'''
+    attributes = span.attributes
+    if span.name == 'app.request':
+        status = 'error' if span.error else attributes.get('status', '')
+        APP_REQUESTS.inc(method=attributes.get('method'),
+                         endpoint=attributes.get('endpoint'), status=status)
+        APP_REQUEST_SECONDS.observe(span.duration,
+                                    method=attributes.get('method'),
+                                    endpoint=attributes.get('endpoint'))
+    elif span.name == 'device.send_celery_script':
+        outcome = 'error' if span.error else attributes.get('outcome', 'sent')
+        RPCS.inc(kind=attributes.get('kind'), outcome=outcome)
+        RPC_SECONDS.observe(span.duration, kind=attributes.get('kind'))
+    elif span.name == 'device.state_read':
+        STATE_READS.inc(outcome='error' if span.error else 'ok')
+        STATE_READ_SECONDS.observe(span.duration)
+
+def _app_counters():
+    '响应缓存和请求调度计数器（只在已使用`app`时）。'
+    app = sys.modules.get('plugin_tools.app')
+    if app is None:
+        return []
+    cache_stats = app.cache_stats()
+    entries = cache_stats.pop('entries')
+    scheduler_stats = app.scheduler_stats()
+    rate = scheduler_stats.pop('rate')
+    families = [
+        ('plugin_tools_cache_events_total', 'counter',
+         'Web app response cache events.', ['event'],
+         [((event,), count) for event, count in sorted(cache_stats.items())]),
+        ('plugin_tools_cache_entries', 'gauge',
+         'Web app response cache entries.', [], [((), entries)]),
+        ('plugin_tools_scheduler_events_total', 'counter',
+         'Web app request scheduler events.', ['event'],
+         [((event,), count)
+          for event, count in sorted(scheduler_stats.items())]),
+        ]
+    if rate is not None:
+        families.append(('plugin_tools_scheduler_rate', 'gauge',
+                         'Web app request rate limit (per second).', [],
+                         [((), rate)]))
+    return families
+
+REGISTRY.add_collector(_app_counters)
+
+def default_name():
+    '''文本文件名称：plugin_tools_<脚本名称>_<进程ID>.prom
+
+    同一插件同时运行的多个进程各自写入一个文件，不会互相覆盖。
+    '''
+    script = os.path.splitext(os.path.basename(sys.argv[0] or ''))[0]
+    if script in ['', '-c']:
+        return 'plugin_tools_{}.prom'.format(os.getpid())
+    return 'plugin_tools_{}_{}.prom'.format(script, os.getpid())
+
+class _Writer(object):
+    '定期写入文本文件的后台线程。'
+
+    def __init__(self, path, interval, registry):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        '写入一次（忽略写入错误，下次再试）。'
+        try:
+            self.registry.write(self.path)
+        except OSError:
+            pass
+
+    def stop(self):
+        '停止线程并最后写入一次。'
+        self._stopped.set()
+        self._thread.join()
+        self.write()
+
+_STATE = {'writer': None}
+
+def start(directory=None, interval=15, name=None, registry=REGISTRY):
+    """开始收集指标并定期写入文本文件。
+
+    参数:
+        directory (str, optional): node_exporter textfile目录。
+            默认为环境变量`PLUGIN_TOOLS_METRICS_DIR`。
+        interval (float, optional): 写入间隔秒数。默认为 15。
+        name (str, optional): 文件名称。默认为`default_name()`。
+    返回：
+        文本文件路径。
+    """
+    stop()
+    directory = directory or os.environ[METRICS_VARIABLE]
+    path = os.path.join(directory, name or default_name())
+    trace.add_listener(record_span)
+    _STATE['writer'] = _Writer(path, interval, registry)
+    return path
+
+def stop():
+    """停止收集指标并最后写入一次文本文件。"""
+    writer = _STATE['writer']
+    if writer is None:
+        return
+    _STATE['writer'] = None
+    trace.remove_listener(record_span)
+    writer.stop()
+
+atexit.register(stop)
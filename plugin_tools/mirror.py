@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：Web应用数据的本地SQLite镜像。'''
+
+from __future__ import print_function
+import os
+import json
+import time
+import sqlite3
+import threading
+from . import app
+from .env import Env
+
+ENV = Env()
+DEFAULT_FILENAME = 'webapp_mirror.sqlite'
+RESOURCES = ['points', 'sequences', 'tools']
+MAX_AGE = 300
+# 单独保存（并建立索引）的点字段；其他搜索条件在解码后的记录上比较。
+POINT_COLUMNS = ['pointer_type', 'name', 'plant_stage', 'planting_slug',
+                 'x', 'y']
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sync (
+    resource TEXT PRIMARY KEY, source TEXT, synced_at REAL);
+CREATE TABLE IF NOT EXISTS points (
+    id INTEGER PRIMARY KEY, updated_at TEXT, data TEXT,
+    pointer_type TEXT, name TEXT, plant_stage TEXT, planting_slug TEXT,
+    x REAL, y REAL);
+CREATE INDEX IF NOT EXISTS points_pointer_type ON points (pointer_type);
+CREATE INDEX IF NOT EXISTS points_plant_stage ON points (plant_stage);
+CREATE INDEX IF NOT EXISTS points_planting_slug ON points (planting_slug);
+CREATE INDEX IF NOT EXISTS points_xy ON points (x, y);
+CREATE TABLE IF NOT EXISTS sequences (
+    id INTEGER PRIMARY KEY, updated_at TEXT, data TEXT, name TEXT);
+CREATE INDEX IF NOT EXISTS sequences_name ON sequences (name);
+CREATE TABLE IF NOT EXISTS tools (
+    id INTEGER PRIMARY KEY, updated_at TEXT, data TEXT, name TEXT);
+CREATE INDEX IF NOT EXISTS tools_name ON tools (name);
+'''
+
+def _table(resource):
+    '资源的表名称（SQL中使用，只允许`RESOURCES`）。'
+    if resource not in RESOURCES:
+        raise ValueError('Unknown mirror resource: {!r}'.format(resource))
+    return resource
+
+def _columns(resource):
+    return POINT_COLUMNS if resource == 'points' else ['name']
+
+def _matches(record, key, value):
+    '与Web应用的点搜索相同：`meta`按子集比较，其他字段按值比较。'
+    if key == 'meta' and isinstance(value, dict):
+        meta = record.get('meta') or {}
+        return all(meta.get(k) == v for k, v in value.items())
+    return record.get(key) == value
+
+class Mirror(object):
+    '''点、序列和工具的本地镜像。
+
+    同步时只写入`updated_at`变化的记录并删除服务器上已删除的记录。
+    查询在本地执行；数据超过`max_age`秒时先同步，同步失败时使用已有数据。
+
+    注意：Web应用没有按`updated_at`过滤的终结点，每次同步都请求完整列表，
+    只有本地写入是增量的。列表没有变化时响应缓存用ETag重新验证（304），
+    不会再次下载。
+    '''
+
+    def __init__(self, path=None, get_info=app._get_required_info,
+                 max_age=MAX_AGE):
+        """
+        参数:
+            path (str, optional): 数据库文件路径（':memory:'表示不保存）。
+                默认为插件数据目录中的`webapp_mirror.sqlite`。
+            max_age (float, optional): 查询前自动同步的间隔秒数。
+                None表示不自动同步。默认为 300。
+        """
+        self.path = path or ENV.plugin_data_path(DEFAULT_FILENAME)
+        self.get_info = get_info
+        self.max_age = max_age
+        if self.path != ':memory:':
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        '''关闭数据库。'''
+        with self._lock:
+            self._connection.close()
+
+    def _source(self):
+        try:
+            return self.get_info()['url']
+        except Exception:
+            return None
+
+    def synced_at(self, resource):
+        '''上次同步`resource`的时间（从未同步时为None）。'''
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT source, synced_at FROM sync WHERE resource = ?',
+                (resource,)).fetchone()
+        if row is None or row[0] != self._source():
+            return None
+        return row[1]
+
+    def sync(self, resources=None):
+        """从Web应用同步（请求完整列表，只写入变化的记录）。
+
+        参数:
+            resources (list, optional): 要同步的资源。默认为全部。
+
+        返回：
+            {resource: 写入或删除的记录数}；请求失败的资源不包含在内。
+        """
+        resources = [_table(resource) for resource in resources or RESOURCES]
+        changes = {}
+        for resource in resources:
+            response = app.get(resource, return_dict=True,
+                               get_info=self.get_info)
+            if response['status_code'] != 200 \
+                    or not isinstance(response['json'], list):
+                print('Mirror sync of {} failed.'.format(resource))
+                continue
+            changes[resource] = self.store(resource, response['json'])
+        return changes
+
+    def store(self, resource, records, replace=True):
+        """保存记录（例如Web应用的响应）。
+
+        参数:
+            resource (str): 'points'、'sequences' 或 'tools'。
+            records (list): 记录字典。
+            replace (bool, optional): 删除不在`records`中的记录，
+                并标记为已同步。默认为 True。
+
+        返回：
+            写入或删除的记录数。
+        """
+        table = _table(resource)
+        columns = _columns(resource)
+        insert = 'INSERT OR REPLACE INTO {} (id, updated_at, data, {}) ' \
+            'VALUES ({})'.format(table, ', '.join(columns),
+                                 ', '.join('?' * (len(columns) + 3)))
+        source = self._source()
+        with self._lock, self._connection:
+            if replace and self.synced_at(resource) is None:
+                self._connection.execute('DELETE FROM {}'.format(table))
+            known = dict(self._connection.execute(
+                'SELECT id, updated_at FROM {}'.format(table)))
+            rows = [
+                [record['id'], record.get('updated_at'), json.dumps(record)]
+                + [record.get(column) for column in columns]
+                for record in records
+                if record['id'] not in known
+                or known[record['id']] != record.get('updated_at')]
+            self._connection.executemany(insert, rows)
+            removed = []
+            if replace:
+                ids = set(record['id'] for record in records)
+                removed = [(_id,) for _id in known if _id not in ids]
+                self._connection.executemany(
+                    'DELETE FROM {} WHERE id = ?'.format(table), removed)
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO sync VALUES (?, ?, ?)',
+                    (resource, source, time.time()))
+        return len(rows) + len(removed)
+
+    def remove(self, resource, _id):
+        '''删除一条记录（例如在Web应用中删除之后）。'''
+        table = _table(resource)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'DELETE FROM {} WHERE id = ?'.format(table), (_id,))
+
+    def _ensure(self, resource):
+        synced_at = self.synced_at(resource)
+        if synced_at is None or (self.max_age is not None
+                                 and time.time() - synced_at > self.max_age):
+            self.sync([resource])
+
+    def _query(self, resource, where='', parameters=()):
+        table = _table(resource)
+        self._ensure(resource)
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT data FROM {} {} ORDER BY id'.format(table, where),
+                parameters).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, resource, _id=None):
+        """获取全部记录，或按ID获取一条记录（不存在时为None）。"""
+        if _id is None:
+            return self._query(resource)
+        records = self._query(resource, 'WHERE id = ?', (_id,))
+        return records[0] if records else None
+
+    def find_by_name(self, resource, name):
+        """按名称获取记录。"""
+        return self._query(resource, 'WHERE name = ?', (name,))
+
+    def search_points(self, search_payload, box=None):
+        """在本地执行`app.search_points`的搜索。
+
+        参数:
+            search_payload (dict): 例如, {'pointer_type': 'Plant'}
+            box (tuple, optional): (x_min, y_min, x_max, y_max) 范围。
+        """
+        conditions = []
+        parameters = []
+        other = {}
+        for key, value in search_payload.items():
+            if key in POINT_COLUMNS:
+                conditions.append('{} IS ?'.format(key))
+                parameters.append(value)
+            else:
+                other[key] = value
+        if box is not None:
+            conditions.append('x BETWEEN ? AND ? AND y BETWEEN ? AND ?')
+            parameters.extend([box[0], box[2], box[1], box[3]])
+        where = 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+        points = self._query('points', where, parameters)
+        return [point for point in points
+                if all(_matches(point, k, v) for k, v in other.items())]
+
+    def points_in_box(self, x_min, y_min, x_max, y_max, search_payload=None):
+        """获取矩形范围内的点（可以附加`search_points`条件）。"""
+        return self.search_points(search_payload or {},
+                                  box=(x_min, y_min, x_max, y_max))
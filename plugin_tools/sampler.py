@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：高速传感器采样（需要NumPy）。'''
+
+from __future__ import print_function
+import time
+import warnings
+import threading
+from .device import read_pins, log
+from ._util import _import_numpy
+
+np = _import_numpy(__name__)
+OVERRUN_WARNING_COUNT = 3
+
+class RingBuffer(object):
+    '''预分配的环形缓冲区：时间戳和每个通道的值，内存占用固定。'''
+
+    def __init__(self, capacity, channels):
+        self.capacity = capacity
+        self.timestamps = np.full(capacity, np.nan)
+        self.values = np.full((capacity, channels), np.nan)
+        self.count = 0
+        self._next = 0
+
+    def append(self, timestamp, values):
+        '''添加一个采样，缓冲区已满时覆盖最早的采样。'''
+        self.timestamps[self._next] = timestamp
+        self.values[self._next] = values
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def window(self, seconds=None, samples=None):
+        """按时间顺序返回最近的采样（副本）。
+
+        参数:
+            seconds (float, optional): 只返回最近几秒内的采样。
+            samples (int, optional): 只返回最近几个采样。
+        返回：
+            (timestamps, values)
+        """
+        size = self.count if samples is None else min(samples, self.count)
+        index = (np.arange(self._next - size, self._next)) % self.capacity
+        timestamps, values = self.timestamps[index], self.values[index]
+        if seconds is not None and size > 0:
+            recent = timestamps >= timestamps[-1] - seconds
+            timestamps, values = timestamps[recent], values[recent]
+        return timestamps, values
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+class Sampler(object):
+    '''以目标频率轮询一组pin并将值存入环形缓冲区。'''
+
+    def __init__(self, pins, rate=1.0, capacity=3600, pin_mode=1,
+                 _read=read_pins):
+        """
+        参数:
+            pins (list): Arduino pin （0到69）。
+            rate (float, optional): 目标采样频率（Hz）。默认为 1。
+            capacity (int, optional): 每个pin保存的采样数。默认为 3600。
+            pin_mode (int, optional): 0（数字）或1（模拟）。默认为 1。
+        """
+        self.pins = list(pins)
+        self.rate = float(rate)
+        self.pin_mode = pin_mode
+        self.buffer = RingBuffer(capacity, len(self.pins))
+        self.overruns = 0
+        self.misses = 0
+        self._read = _read
+        self._consecutive_overruns = 0
+        self._warned = False
+        self._started = None
+        self._samples_taken = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        """读取一次所有pin并添加到缓冲区。
+
+        返回：
+            bool: 读取失败（计入`misses`）时为False。
+        """
+        result = self._read(self.pins, pin_mode=self.pin_mode)
+        if result is None:
+            self.misses += 1
+            return False
+        values = [_to_float(result['values'].get(pin)) for pin in self.pins]
+        self.buffer.append(result['timestamp'], values)
+        self._samples_taken += 1
+        return True
+
+    def run(self, duration=None, samples=None):
+        """阻塞式采样，直到经过`duration`秒、取得`samples`个采样或调用`stop()`。
+
+        按固定时刻调度（不累积漂移）。某次采样超出周期时计为一次超时，
+        并从当前时间重新调度，而不是连续补采。
+        `samples`只计算成功的采样；读取失败计入`status()['misses']`。
+        """
+        self._stop.clear()
+        self._run(duration, samples)
+
+    def _run(self, duration, samples):
+        period = 1.0 / self.rate
+        self._started = self._started or time.time()
+        end = None if duration is None else time.time() + duration
+        taken = 0
+        next_time = time.time()
+        while not self._stop.is_set():
+            if end is not None and time.time() >= end:
+                break
+            if samples is not None and taken >= samples:
+                break
+            if self.sample():
+                taken += 1
+            next_time += period
+            delay = next_time - time.time()
+            if delay < 0:
+                self._overrun()
+                next_time = time.time()
+            else:
+                self._consecutive_overruns = 0
+                self._stop.wait(delay)
+
+    def _overrun(self):
+        self.overruns += 1
+        self._consecutive_overruns += 1
+        if self._consecutive_overruns >= OVERRUN_WARNING_COUNT \
+                and not self._warned:
+            self._warned = True
+            log('Sampling rate {:g} Hz cannot be sustained ({:.2f} Hz).'.format(
+                self.rate, self.achieved_rate()), 'warn')
+
+    def start(self, duration=None):
+        '''在后台线程中开始采样。'''
+        self._stop.clear()  # 在线程开始之前：之后调用的`stop()`不会被取消
+        self._thread = threading.Thread(
+            target=self._run, args=(duration, None))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        '''停止采样。'''
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def achieved_rate(self):
+        '''启动以来的实际采样频率（Hz）。'''
+        if self._started is None or self._samples_taken < 2:
+            return 0.0
+        elapsed = time.time() - self._started
+        return self._samples_taken / elapsed if elapsed > 0 else 0.0
+
+    def status(self):
+        '''采样状态：目标频率、实际频率、读取失败和超时次数以及能否维持目标频率。'''
+        return {
+            'rate': self.rate,
+            'achieved_rate': self.achieved_rate(),
+            'samples': self._samples_taken,
+            'misses': self.misses,
+            'overruns': self.overruns,
+            'sustained': self._consecutive_overruns < OVERRUN_WARNING_COUNT,
+            }
+
+    def _aggregate(self, function, seconds, samples):
+        _, values = self.buffer.window(seconds, samples)
+        if len(values) == 0:
+            return {pin: None for pin in self.pins}
+        with warnings.catch_warnings():  # 全部为NaN的pin返回None
+            warnings.simplefilter('ignore', RuntimeWarning)
+            results = function(values)
+        return {pin: None if np.isnan(result) else float(result)
+                for pin, result in zip(self.pins, results)}
+
+    def mean(self, seconds=None, samples=None):
+        '''窗口内每个pin的平均值。'''
+        return self._aggregate(
+            lambda v: np.nanmean(v, axis=0), seconds, samples)
+
+    def minimum(self, seconds=None, samples=None):
+        '''窗口内每个pin的最小值。'''
+        return self._aggregate(
+            lambda v: np.nanmin(v, axis=0), seconds, samples)
+
+    def maximum(self, seconds=None, samples=None):
+        '''窗口内每个pin的最大值。'''
+        return self._aggregate(
+            lambda v: np.nanmax(v, axis=0), seconds, samples)
+
+    def percentile(self, q, seconds=None, samples=None):
+        '''窗口内每个pin的百分位数（`q`为0到100）。'''
+        return self._aggregate(
+            lambda v: np.nanpercentile(v, q, axis=0), seconds, samples)
+
+    def ewma(self, alpha=0.1, seconds=None, samples=None):
+        """窗口内每个pin的指数加权移动平均值。
+
+        参数:
+            alpha (float, optional): 平滑系数（0到1），越大越偏重新采样。
+        """
+        def _ewma(values):
+            age = np.arange(len(values) - 1, -1, -1)
+            weights = ((1 - alpha) ** age)[:, np.newaxis] * ~np.isnan(values)
+            return np.nansum(values * weights, axis=0) / weights.sum(axis=0)
+        return self._aggregate(_ewma, seconds, samples)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：Web应用请求调度（限速、重试和并发上限）。'''
+
+import time
+import random
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+IDEMPOTENT_METHODS = ['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE']
+THROTTLED = 429
+RETRY_STATUS_CODES = [THROTTLED, 502, 503, 504]
+MAX_CONCURRENCY = 8
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30
+MIN_RATE = 0.1
+RATE_INCREASE = 0.5  # 每次成功增加的速率（速率上限的比例）
+
+def retry_after_seconds(response):
+    '解析`Retry-After`响应头（秒数或HTTP日期），没有时返回None。'
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket(object):
+    '''令牌桶：平均每秒`rate`个请求，最多连续`burst`个。'''
+
+    def __init__(self, rate=None, burst=10):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.time()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds):
+        '''在`seconds`秒内不发放令牌（例如服务器返回`Retry-After`时）。'''
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.time() + seconds)
+
+    def _wait_time(self):
+        now = time.time()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.rate is None:
+            return 0
+        self._tokens = min(self.burst,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        '''等待直到获得一个令牌。'''
+        while True:
+            with self._lock:
+                wait_time = self._wait_time()
+            if wait_time <= 0:
+                return
+            time.sleep(wait_time)
+
+class RequestScheduler(object):
+    '''Web应用请求调度器。
+
+    - 令牌桶限速，服务器限流时速率减半（不限速时从最近一秒的实际速率开始），
+      之后每次成功逐步恢复（AIMD）。每个拥塞窗口只减速一次：在上次减速之前
+      发送的请求收到的429不再减速；速率也不低于服务器最近一秒接受的请求速率。
+    - 遵守`Retry-After`（最长`max_backoff`秒）：所有线程在此期间暂停发送。
+    - 幂等方法在429/502/503/504和连接错误时按指数退避（带抖动）重试；
+      429表示服务器未处理请求，因此所有方法都会重试。
+    - 全局并发上限。
+    '''
+
+    def __init__(self, rate=None, burst=10, max_concurrency=MAX_CONCURRENCY,
+                 max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS,
+                 max_backoff=MAX_BACKOFF_SECONDS):
+        """
+        参数:
+            rate (float, optional): 每秒最大请求数。默认为 None（不限速，
+                直到服务器限流）。
+            burst (int, optional): 最大连续请求数。默认为 10。
+            max_concurrency (int, optional): 同时进行的最大请求数。默认为 8。
+            max_retries (int, optional): 最大重试次数。默认为 4。
+            backoff (float, optional): 第一次重试前的等待秒数。默认为 0.5。
+            max_backoff (float, optional): 最长等待秒数。默认为 30。
+        """
+        self.counts = {'requests': 0, 'retries': 0, 'throttled': 0}
+        self._lock = threading.Lock()
+        self.configure(rate, burst, max_concurrency, max_retries, backoff,
+                       max_backoff)
+
+    def configure(self, rate=None, burst=10, max_concurrency=MAX_CONCURRENCY,
+                  max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS,
+                  max_backoff=MAX_BACKOFF_SECONDS):
+        '''修改设置（参数同构造函数）。'''
+        self.max_rate = rate
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._ceiling = rate
+        self._sent = deque(maxlen=1000)
+        self._admitted = deque(maxlen=1000)
+        self._decreased_at = 0.0
+
+    def stats(self):
+        '调度计数器：requests、retries、throttled，以及当前速率。'
+        with self._lock:
+            stats = dict(self.counts)
+        stats['rate'] = self.bucket.rate
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    @staticmethod
+    def _recent_rate(times):
+        '最近一秒内的请求数。'
+        now = time.time()
+        return sum(1 for sent in list(times) if now - sent <= 1)
+
+    def _throttled(self, delay, sent_at):
+        self._count('throttled')
+        self.bucket.pause(min(delay, self.max_backoff))
+        with self._lock:
+            if sent_at < self._decreased_at:  # 同一拥塞窗口：已经减速。
+                return
+            self._decreased_at = time.time()
+            rate = self.bucket.rate
+            if rate is None:  # 不限速时从实际发送速率开始。
+                rate = self._ceiling = max(1, self._recent_rate(self._sent))
+            floor = max(MIN_RATE, self._recent_rate(self._admitted))
+            self.bucket.rate = max(min(floor, rate), rate / 2)
+
+    def _succeeded(self):
+        with self._lock:
+            self._admitted.append(time.time())
+            rate = self.bucket.rate
+            if rate is None:
+                return
+            ceiling = self.max_rate or self._ceiling
+            # 大约每秒增加上限的`RATE_INCREASE`（每秒约有`rate`次成功）。
+            rate += RATE_INCREASE * ceiling / max(1, rate)
+            if self.max_rate is None and rate >= ceiling:
+                rate = None
+            self.bucket.rate = rate if rate is None else min(ceiling, rate)
+
+    def _delay(self, attempt):
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(delay / 2, delay)  # 抖动
+
+    def send(self, send_function, method, url, **kwargs):
+        """通过调度器发送请求。
+
+        参数:
+            send_function: 例如`sessions.request`。
+            method (str): HTTP请求方法。
+            url (str): 请求地址。
+            **kwargs: 传递给`send_function`。
+
+        返回：
+            最后一次尝试的响应；重试用尽后的连接错误会被重新抛出。
+        """
+        idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            self._count('requests')
+            sent_at = time.time()
+            self._sent.append(sent_at)
+            try:
+                with self._slots:
+                    response = send_function(method, url, **kwargs)
+            except RequestsConnectionError:
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+            else:
+                status_code = response.status_code
+                if status_code not in RETRY_STATUS_CODES:
+                    self._succeeded()
+                    return response
+                retry_after = retry_after_seconds(response)
+                if status_code == THROTTLED or retry_after is not None:
+                    self._throttled(retry_after or self._delay(attempt),
+                                    sent_at)
+                retry = idempotent or status_code == THROTTLED
+                if not retry or attempt >= self.max_retries:
+                    return response
+                response.close()
+                if retry_after is not None:
+                    time.sleep(min(retry_after, self.max_backoff))
+                    attempt += 1
+                    self._count('retries')
+                    continue
+            time.sleep(self._delay(attempt))
+            attempt += 1
+            self._count('retries')
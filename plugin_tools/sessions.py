@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：共享HTTP会话（连接池和keep-alive）。'''
+
+import threading
+
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 10
+
+_LOCK = threading.Lock()
+_POOL = {
+    'session': None,
+    'config': {
+        'pool_connections': POOL_CONNECTIONS,
+        'pool_maxsize': POOL_MAXSIZE,
+        'pool_block': False,
+        },
+    }
+
+def _new_session(config):
+    import requests  # 第一次请求时才导入（加快插件启动）。
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    for prefix in ['http://', 'https://']:
+        session.mount(prefix, HTTPAdapter(**config))
+    return session
+
+def configure(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+              pool_block=False):
+    """配置共享会话的连接池。
+
+    关闭当前会话；下一次请求时按新配置创建会话。
+
+    参数:
+        pool_connections (int, optional): 缓存连接池的主机数量。默认为 4。
+        pool_maxsize (int, optional): 每个主机保持的最大连接数。默认为 10。
+        pool_block (bool, optional): 连接数达到`pool_maxsize`时等待空闲连接，
+            而不是打开额外的（不保留的）连接。默认为 False。
+    """
+    with _LOCK:
+        _POOL['config'] = {
+            'pool_connections': pool_connections,
+            'pool_maxsize': pool_maxsize,
+            'pool_block': pool_block,
+            }
+        _close()
+
+def get_session():
+    """获取共享的`requests.Session`（首次使用时创建）。"""
+    session = _POOL['session']
+    if session is None:
+        with _LOCK:
+            if _POOL['session'] is None:
+                _POOL['session'] = _new_session(_POOL['config'])
+            session = _POOL['session']
+    return session
+
+def _close():
+    if _POOL['session'] is not None:
+        _POOL['session'].close()
+        _POOL['session'] = None
+
+def close():
+    """关闭共享会话及其所有连接。"""
+    with _LOCK:
+        _close()
+
+def request(method, url, **kwargs):
+    """通过共享会话发送HTTP请求（参数同`requests.request`）。"""
+    return get_session().request(method, url, **kwargs)
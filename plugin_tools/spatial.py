@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：点的空间索引（需要NumPy）。'''
+
+from __future__ import print_function
+import math
+from . import app
+from ._util import _import_numpy
+
+np = _import_numpy(__name__)
+DEFAULT_CELL_SIZE = 100
+
+class PointIndex(object):
+    '''基于均匀网格的点索引，支持最近k个、半径和矩形查询。
+
+    每个网格单元保存其中点的行号；坐标保存在NumPy数组中，
+    候选点的距离以向量化方式计算。添加和删除都是增量的。
+    '''
+
+    def __init__(self, points=None, cell_size=DEFAULT_CELL_SIZE):
+        """
+        参数:
+            points (list, optional): `app.search_points`的结果。
+            cell_size (float, optional): 网格单元大小（mm）。默认为 100。
+        """
+        self.cell_size = float(cell_size)
+        self._xy = np.zeros((0, 2))
+        self._points = []
+        self._rows = {}  # {point id: row}
+        self._cells = {}  # {(i, j): [row, ...]}
+        self._bounds = None  # 单元范围 [i_min, j_min, i_max, j_max]
+        self._size = 0
+        if points is not None:
+            self.extend(points)
+
+    @classmethod
+    def from_search(cls, search_payload, get_info=app._get_required_info,
+                    cell_size=DEFAULT_CELL_SIZE):
+        """从Web应用的点搜索结果建立索引。
+
+        参数:
+            search_payload (dict): 例如, {'pointer_type': 'Plant'}
+        """
+        points = app.search_points(search_payload, get_info=get_info)
+        if not isinstance(points, list):
+            points = []
+        return cls(points, cell_size)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _cell(self, x, y):
+        return (int(math.floor(x / self.cell_size)),
+                int(math.floor(y / self.cell_size)))
+
+    def _grow(self, size):
+        if self._size + size > len(self._xy):
+            capacity = max(2 * len(self._xy), self._size + size, 64)
+            xy = np.zeros((capacity, 2))
+            xy[:self._size] = self._xy[:self._size]
+            self._xy = xy
+
+    def extend(self, points):
+        '''添加多个点（`app.search_points`结果中的字典）。'''
+        points = [p for p in points if isinstance(p, dict)]
+        self._grow(len(points))
+        for point in points:
+            if point.get('id') in self._rows:
+                self.remove(point['id'])
+            row = self._size
+            self._size += 1
+            self._xy[row] = (point['x'], point['y'])
+            self._points.append(point)
+            self._rows[point.get('id', ('row', row))] = row
+            i, j = self._cell(point['x'], point['y'])
+            self._cells.setdefault((i, j), []).append(row)
+            if self._bounds is None:
+                self._bounds = [i, j, i, j]
+            else:
+                bounds = self._bounds
+                bounds[:] = [min(bounds[0], i), min(bounds[1], j),
+                             max(bounds[2], i), max(bounds[3], j)]
+
+    def add(self, point):
+        '''添加一个点（或用相同ID的点替换）。'''
+        self.extend([point])
+
+    update = add
+
+    def remove(self, _id):
+        '''按ID删除点。'''
+        row = self._rows.pop(_id, None)
+        if row is None:
+            return
+        x, y = self._xy[row]
+        cell = self._cell(x, y)
+        self._cells[cell].remove(row)
+        if not self._cells[cell]:
+            del self._cells[cell]
+        self._points[row] = None
+
+    def add_plant(self, x, y, get_info=app._get_required_info, **kwargs):
+        """在花园地图上添加植物（`app.add_plant`）并加入索引。"""
+        plant = app.add_plant(x, y, get_info=get_info, **kwargs)
+        if isinstance(plant, dict) and 'x' in plant:
+            self.add(plant)
+        return plant
+
+    def delete(self, _id, get_info=app._get_required_info):
+        """从Web应用删除点（`app.delete('points', _id)`），成功后移出索引。"""
+        response = app.delete('points', _id, get_info=get_info,
+                              return_dict=True)
+        if 200 <= response['status_code'] < 300:
+            self.remove(_id)
+        return response['json']
+
+    def _rows_in_cells(self, i_range, j_range):
+        if len(i_range) * len(j_range) > len(self._cells):
+            cells = [rows for (i, j), rows in self._cells.items()
+                     if i_range[0] <= i <= i_range[-1]
+                     and j_range[0] <= j <= j_range[-1]]
+        else:
+            cells = [self._cells.get((i, j), ()) for i in i_range
+                     for j in j_range]
+        return np.fromiter((r for rows in cells for r in rows), dtype=int)
+
+    def _sorted_by_distance(self, rows, x, y, limit=None):
+        distance = np.hypot(self._xy[rows, 0] - x, self._xy[rows, 1] - y)
+        if limit is not None:
+            rows, distance = rows[distance <= limit], distance[distance <= limit]
+        order = np.argsort(distance, kind='stable')
+        return rows[order], distance[order]
+
+    def _result(self, rows):
+        return [self._points[row] for row in rows.tolist()]
+
+    def within(self, x, y, radius):
+        """获取距离(x, y)不超过`radius`的点，按距离排序。"""
+        i_min, j_min = self._cell(x - radius, y - radius)
+        i_max, j_max = self._cell(x + radius, y + radius)
+        rows = self._rows_in_cells(range(i_min, i_max + 1),
+                                   range(j_min, j_max + 1))
+        rows, _ = self._sorted_by_distance(rows, x, y, radius)
+        return self._result(rows)
+
+    def in_box(self, x_min, y_min, x_max, y_max):
+        """获取矩形范围内的点。"""
+        i_min, j_min = self._cell(x_min, y_min)
+        i_max, j_max = self._cell(x_max, y_max)
+        rows = self._rows_in_cells(range(i_min, i_max + 1),
+                                   range(j_min, j_max + 1))
+        xy = self._xy[rows]
+        inside = (xy[:, 0] >= x_min) & (xy[:, 0] <= x_max) \
+            & (xy[:, 1] >= y_min) & (xy[:, 1] <= y_max)
+        return self._result(np.sort(rows[inside]))
+
+    def nearest(self, x, y, k=1):
+        """获取距离(x, y)最近的`k`个点，按距离排序。"""
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        center_i, center_j = self._cell(x, y)
+        # 覆盖所有非空单元所需的环数。
+        i_min, j_min, i_max, j_max = self._bounds
+        max_ring = max(center_i - i_min, i_max - center_i,
+                       center_j - j_min, j_max - center_j)
+        # 从第一个可能包含点的环开始。
+        ring = max(0, i_min - center_i, center_i - i_max,
+                   j_min - center_j, center_j - j_max)
+        while True:
+            rows = self._rows_in_cells(
+                range(center_i - ring, center_i + ring + 1),
+                range(center_j - ring, center_j + ring + 1))
+            # 环内的点之外，最近的点距离至少为`covered`。
+            covered = self._covered_distance(x, y, ring)
+            if len(rows) >= k:
+                rows, distance = self._sorted_by_distance(rows, x, y)
+                if distance[k - 1] <= covered or ring >= max_ring:
+                    return self._result(rows[:k])
+            ring += 1
+
+    def _covered_distance(self, x, y, ring):
+        '以(x, y)所在单元为中心、`ring`环的正方形范围内可以保证的最小距离。'
+        i, j = self._cell(x, y)
+        size = self.cell_size
+        return min(x - (i - ring) * size, (i + ring + 1) * size - x,
+                   y - (j - ring) * size, (j + ring + 1) * size - y)
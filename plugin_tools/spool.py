@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：Web应用修改的后台写入队列（持久化到SQLite）。'''
+
+from __future__ import print_function
+import os
+import json
+import time
+import sqlite3
+import threading
+from requests.exceptions import RequestException
+from . import app
+from .env import Env
+
+ENV = Env()
+DEFAULT_FILENAME = 'webapp_spool.sqlite'
+BATCH_SIZE = 20
+RETRY_SECONDS = 1
+MAX_RETRY_SECONDS = 60
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS queue (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, method TEXT, endpoint TEXT,
+    _id INTEGER, payload TEXT, attempts INTEGER DEFAULT 0);
+'''
+
+RETRY_STATUS_CODES = [0, 408, 429]
+
+def _retry(response):
+    '请求没有送达或服务器暂时不可用（0、408、429或5xx）时稍后重试。'
+    status_code = response['status_code']
+    return not status_code or status_code in RETRY_STATUS_CODES \
+        or status_code >= 500
+
+class Handle(object):
+    '''排队请求的句柄。'''
+
+    def __init__(self, seq):
+        self.seq = seq
+        self.response = None  # {'json': ..., 'status_code': ...}
+        self._done = threading.Event()
+
+    def done(self):
+        '''请求是否已发送（或被服务器拒绝）。'''
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """等待请求完成。
+
+        返回：
+            {'json': ..., 'status_code': ...}，超时时为None。
+        """
+        self._done.wait(timeout)
+        return self.response
+
+    def _set(self, response):
+        self.response = response
+        self._done.set()
+
+class WriteBehindQueue(object):
+    '''修改请求先写入磁盘队列并立即返回句柄，由后台线程按顺序发送。
+
+    每次从队列读取最多`batch_size`个请求；每个请求发送后立即在自己的事务中
+    删除，进程在一批中途退出时已发送的请求不会重复发送（例如重复添加植物）。
+    未发送的请求（连接错误、没有令牌时的状态码 0）以及408、429和5xx响应
+    会保留在队列中，按指数退避重试；
+    进程退出时未发送的请求会在下次打开队列时继续发送。
+    '''
+
+    def __init__(self, path=None, get_info=app._get_required_info,
+                 batch_size=BATCH_SIZE, retry_seconds=RETRY_SECONDS,
+                 max_retry_seconds=MAX_RETRY_SECONDS):
+        """
+        参数:
+            path (str, optional): 队列文件路径。默认为插件数据目录中的
+                `webapp_spool.sqlite`。
+            batch_size (int, optional): 每批发送的请求数。默认为 20。
+            retry_seconds (float, optional): 第一次重试前的等待秒数。默认为 1。
+            max_retry_seconds (float, optional): 最长等待秒数。默认为 60。
+        """
+        self.path = path or ENV.plugin_data_path(DEFAULT_FILENAME)
+        self.get_info = get_info
+        self.batch_size = batch_size
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._handles = {}  # {seq: Handle}
+        self._done_through = 0  # 已完成的最大序号
+        self._running = True
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run)
+        self._worker.daemon = True
+        self._worker.start()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM queue').fetchone()[0]
+
+    def submit(self, method, endpoint, _id=None, payload=None):
+        """把请求加入队列。
+
+        参数:
+            method (str): HTTP请求方法 ('POST', 'PATCH', etc.)
+            endpoint (str): Web应用程序终结点 ('logs', 'points', etc.)
+            _id (int, optional): Web应用资源ID。默认为None.
+            payload (dict, optional): 例如 {'name': 'new tool'}
+
+        返回：
+            Handle
+        """
+        with self._condition:
+            with self._connection:
+                seq = self._connection.execute(
+                    'INSERT INTO queue (method, endpoint, _id, payload) '
+                    'VALUES (?, ?, ?, ?)',
+                    (method.upper(), endpoint, _id,
+                     json.dumps(payload))).lastrowid
+            handle = self._handles[seq] = Handle(seq)
+            self._condition.notify_all()
+        return handle
+
+    def post(self, endpoint, payload):
+        """排队Post请求（参数同`app.post`）。"""
+        return self.submit('POST', endpoint, payload=payload)
+
+    def patch(self, endpoint, _id=None, payload=None):
+        """排队Patch请求（参数同`app.patch`）。"""
+        return self.submit('PATCH', endpoint, _id, payload)
+
+    def put(self, endpoint, _id=None, payload=None):
+        """排队Put请求（参数同`app.put`）。"""
+        return self.submit('PUT', endpoint, _id, payload)
+
+    def delete(self, endpoint, _id=None):
+        """排队Delete请求（参数同`app.delete`）。"""
+        return self.submit('DELETE', endpoint, _id)
+
+    def log(self, message, message_type='info'):
+        """排队日志消息（参数同`app.log`）。"""
+        return self.post('logs', {'message': message, 'type': message_type})
+
+    def add_plant(self, x, y, **kwargs):
+        """排队添加植物（参数同`app.add_plant`）。"""
+        new_plant = {'pointer_type': 'Plant', 'x': x, 'y': y}
+        for key, value in kwargs.items():
+            if value is not None:
+                new_plant[key] = value
+        return self.post('points', new_plant)
+
+    def flush(self, timeout=None):
+        """等待此前加入队列的所有请求发送完成。
+
+        返回：
+            bool: 超时时为False。
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            target = self._connection.execute(
+                'SELECT MAX(seq) FROM queue').fetchone()[0] or 0
+            while self._done_through < target:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout=10):
+        """发送队列中的请求（最多等待`timeout`秒）并停止后台线程。
+
+        未发送的请求保留在磁盘上，下次打开队列时发送。
+        """
+        self.flush(timeout)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._stopped.set()
+        self._worker.join()
+        self._connection.close()
+
+    def _next_batch(self):
+        with self._condition:
+            while self._running:
+                rows = self._connection.execute(
+                    'SELECT seq, method, endpoint, _id, payload, attempts '
+                    'FROM queue ORDER BY seq LIMIT ?',
+                    (self.batch_size,)).fetchall()
+                if rows:
+                    return rows
+                self._condition.wait()
+            return []
+
+    def _send(self, method, endpoint, _id, payload):
+        try:
+            response = app.request(method, endpoint, _id=_id,
+                                   payload=json.loads(payload),
+                                   return_dict=True, get_info=self.get_info)
+        except RequestException:
+            return None
+        if _retry(response):
+            return None
+        return response
+
+    def _finish(self, seq, response):
+        with self._condition:
+            with self._connection:
+                self._connection.execute('DELETE FROM queue WHERE seq = ?',
+                                         (seq,))
+            handle = self._handles.pop(seq, None)
+            if handle is not None:
+                handle._set(response)
+            self._done_through = max(self._done_through, seq)
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            rows = self._next_batch()
+            if not rows:
+                return
+            failed = None
+            for seq, method, endpoint, _id, payload, attempts in rows:
+                response = self._send(method, endpoint, _id, payload)
+                if response is None:  # 保持顺序：后面的请求等待重试。
+                    failed = (seq, attempts)
+                    break
+                self._finish(seq, response)
+            if failed is not None:
+                seq, attempts = failed
+                with self._condition:
+                    with self._connection:
+                        self._connection.execute(
+                            'UPDATE queue SET attempts = ? WHERE seq = ?',
+                            (attempts + 1, seq))
+                self._stopped.wait(min(self.max_retry_seconds,
+                                       self.retry_seconds * 2 ** attempts))
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：计时跨度（Chrome trace / Perfetto 导出）。
+
+    from plugin_tools import trace
+    trace.enable()
+    ...
+    trace.export('plugin_trace.json')  # 在 chrome://tracing 或 ui.perfetto.dev 中打开
+
+设置环境变量`PLUGIN_TOOLS_TRACE`为文件路径时，导入时启用并在进程退出时导出。
+'''
+
+import os
+import json
+import time
+import atexit
+import itertools
+import threading
+import contextvars
+from functools import wraps
+
+TRACE_VARIABLE = 'PLUGIN_TOOLS_TRACE'
+MAX_SPANS = 100000
+
+_CURRENT = contextvars.ContextVar('plugin_tools_span', default=None)
+_IDS = itertools.count(1)
+_LOCK = threading.Lock()
+_STATE = {'enabled': False, 'spans': [], 'listeners': []}
+
+class Span(object):
+    '''一个计时跨度。'''
+
+    __slots__ = ['id', 'name', 'attributes', 'parent', 'start', 'end',
+                 'thread', 'error']
+
+    def __init__(self, name, attributes, parent):
+        self.id = next(_IDS)
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.thread = threading.get_ident()
+        self.error = None
+        self.start = time.time()
+        self.end = None
+
+    @property
+    def duration(self):
+        '''持续秒数（未结束时为None）。'''
+        return None if self.end is None else self.end - self.start
+
+    def set(self, **attributes):
+        '''添加属性，例如 status=200。'''
+        self.attributes.update(attributes)
+
+class _NoSpan(object):
+    '未启用跟踪时使用：忽略属性。'
+    def set(self, **attributes):
+        'Ignore attributes.'
+
+_NO_SPAN = _NoSpan()
+
+def _active():
+    return _STATE['enabled'] or bool(_STATE['listeners'])
+
+def enable():
+    """开始记录跨度。"""
+    _STATE['enabled'] = True
+
+def disable():
+    """停止记录跨度（监听器仍然接收跨度）。"""
+    _STATE['enabled'] = False
+
+def add_listener(listener):
+    """注册在每个跨度结束时调用的函数`listener(span)`。"""
+    with _LOCK:
+        _STATE['listeners'].append(listener)
+
+def remove_listener(listener):
+    """删除监听器。"""
+    with _LOCK:
+        if listener in _STATE['listeners']:
+            _STATE['listeners'].remove(listener)
+
+def current():
+    """当前线程或任务中正在进行的跨度（没有时为None）。"""
+    return _CURRENT.get()
+
+def annotate(**attributes):
+    """为当前跨度添加属性。"""
+    current_span = _CURRENT.get()
+    if current_span is not None:
+        current_span.set(**attributes)
+
+class _SpanContext(object):
+    '`span()`返回的上下文管理器。'
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self._span = None
+        self._token = None
+
+    def __enter__(self):
+        if not _active():
+            return _NO_SPAN
+        parent = _CURRENT.get()
+        self._span = Span(self.name, self.attributes,
+                          None if parent is None else parent.id)
+        self._token = _CURRENT.set(self._span)
+        return self._span
+
+    def __exit__(self, exception_type, exception, _traceback):
+        if self._span is None:
+            return
+        finished = self._span
+        finished.end = time.time()
+        if exception_type is not None:
+            finished.error = exception_type.__name__
+        _CURRENT.reset(self._token)
+        self._span = self._token = None
+        with _LOCK:
+            if _STATE['enabled'] and len(_STATE['spans']) < MAX_SPANS:
+                _STATE['spans'].append(finished)
+            listeners = list(_STATE['listeners'])
+        for listener in listeners:
+            listener(finished)
+
+def span(name, **attributes):
+    """计时跨度上下文管理器。跨度按线程或asyncio任务嵌套。
+
+        with trace.span('move', x=10) as current_span:
+            ...
+            current_span.set(status='done')
+
+    参数:
+        name (str): 跨度名称，例如 'app.request'。
+        **attributes: 跨度属性。
+    """
+    return _SpanContext(name, attributes)
+
+def traced(name):
+    """装饰器：在跨度中运行函数。"""
+    def _decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _active():
+                return function(*args, **kwargs)
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return _decorator
+
+def spans():
+    """已记录的跨度。"""
+    with _LOCK:
+        return list(_STATE['spans'])
+
+def clear():
+    """删除已记录的跨度。"""
+    with _LOCK:
+        del _STATE['spans'][:]
+
+def _event(recorded, pid):
+    args = dict((k, v if isinstance(v, (int, float, str, bool, type(None)))
+                 else repr(v)) for k, v in recorded.attributes.items())
+    args['span_id'] = recorded.id
+    if recorded.parent is not None:
+        args['parent_id'] = recorded.parent
+    if recorded.error is not None:
+        args['error'] = recorded.error
+    return {'name': recorded.name, 'cat': recorded.name.split('.')[0],
+            'ph': 'X', 'ts': recorded.start * 1e6,
+            'dur': recorded.duration * 1e6, 'pid': pid,
+            'tid': recorded.thread, 'args': args}
+
+def export(path):
+    """把已记录的跨度写入Chrome trace（Perfetto）JSON文件。
+
+    参数:
+        path (str): 文件路径。
+    返回：
+        写入的跨度数。
+    """
+    pid = os.getpid()
+    events = [_event(recorded, pid) for recorded in spans()]
+    with open(path, 'w') as trace_file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'},
+                  trace_file)
+    return len(events)
+
+if os.getenv(TRACE_VARIABLE):
+    enable()
+    atexit.register(export, os.getenv(TRACE_VARIABLE))
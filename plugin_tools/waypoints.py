@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：路径点规划（需要NumPy）。'''
+
+from __future__ import print_function
+import time
+from .device import assemble_coordinate, move_absolute
+from ._util import _import_numpy
+
+np = _import_numpy(__name__)
+DEFAULT_SPEEDS = (1.0, 1.0, 1.0)
+TWO_OPT_WINDOW = 64
+TIME_LIMIT_SECONDS = 0.6
+
+def _as_coordinates(points):
+    '将`search_points`结果或坐标数组转换为N×3浮点数组。'
+    if isinstance(points, np.ndarray):
+        coordinates = np.asarray(points, dtype=float)
+    else:
+        points = list(points)
+        if len(points) > 0 and isinstance(points[0], dict):
+            coordinates = np.array(
+                [[p['x'], p['y'], p.get('z') or 0] for p in points],
+                dtype=float)
+        else:
+            coordinates = np.array(points, dtype=float)
+    if coordinates.size == 0:
+        return np.zeros((0, 3))
+    if coordinates.ndim != 2 or coordinates.shape[1] not in [2, 3]:
+        raise ValueError('Expected N×2 or N×3 coordinates, got shape {}.'.format(
+            coordinates.shape))
+    if coordinates.shape[1] == 2:
+        coordinates = np.column_stack([coordinates, np.zeros(len(coordinates))])
+    return coordinates
+
+def _scale(coordinates, speeds, safe_z):
+    '''按轴速度缩放坐标，使缩放坐标之间的切比雪夫距离等于移动时间。
+
+    使用安全高度时，每一段都在安全高度上平移，Z轴的升降时间
+    只取决于各点本身，不影响顺序，因此只比较X和Y。
+    '''
+    scaled = coordinates / np.asarray(speeds, dtype=float)
+    if safe_z is not None:
+        scaled[:, 2] = 0
+    return scaled
+
+def _nearest_neighbour(scaled, start):
+    '向量化最近邻：每一步在剩余点中选择移动时间最短的点。'
+    count = len(scaled)
+    remaining = np.arange(count)
+    rx, ry, rz = [scaled[:, axis].copy() for axis in range(3)]
+    order = np.empty(count, dtype=int)
+    current = start
+    for step in range(count):
+        distance = np.maximum(np.abs(rx - current[0]), np.abs(ry - current[1]))
+        np.maximum(distance, np.abs(rz - current[2]), out=distance)
+        nearest = int(np.argmin(distance))
+        order[step] = remaining[nearest]
+        current = (rx[nearest], ry[nearest], rz[nearest])
+        # 用最后一个剩余点覆盖已访问点，保持剩余数组紧凑。
+        last = len(remaining) - 1
+        for array in (remaining, rx, ry, rz):
+            array[nearest] = array[last]
+        remaining, rx, ry, rz = remaining[:-1], rx[:-1], ry[:-1], rz[:-1]
+    return order
+
+def _edge_time(a, b):
+    '切比雪夫（并行轴）移动时间。NaN（路径终点之后）计为0。'
+    return np.nan_to_num(np.abs(a - b).max(axis=-1))
+
+def _two_opt(scaled, start, order, window, deadline):
+    '''窗口化2-opt：同时评估所有长度不超过`window`的片段反转，
+    每轮应用一组互不重叠的改进。路径起点固定，终点开放。
+    '''
+    path = np.concatenate([[-1], order])
+    while time.time() < deadline:
+        points = np.vstack([start, scaled[path[1:]], [np.nan] * 3])
+        size = len(path)
+        edges = _edge_time(points[:-1], points[1:])
+        moves = []
+        for width in range(2, min(window, size - 1) + 1):
+            i = np.arange(0, size - width)
+            j = i + width
+            gain = (edges[i] + edges[j]
+                    - _edge_time(points[i], points[j])
+                    - _edge_time(points[i + 1], points[j + 1]))
+            improving = np.nonzero(gain > 1e-9)[0]
+            if len(improving) > 0:
+                moves.append(np.column_stack(
+                    [gain[improving], i[improving], j[improving]]))
+        if not moves:
+            break
+        moves = np.vstack(moves)
+        moves = moves[np.argsort(-moves[:, 0])]
+        # 贪心地选择互不重叠的片段，它们可以在同一轮中一起反转。
+        used = np.zeros(size + 1, dtype=bool)
+        for _, i, j in moves:
+            i, j = int(i), int(j)
+            if used[i:j + 2].any():
+                continue
+            used[i:j + 2] = True
+            path[i + 1:j + 1] = path[i + 1:j + 1][::-1].copy()
+    return path[1:]
+
+def plan_route(points, start=(0, 0, 0), speeds=DEFAULT_SPEEDS, safe_z=None,
+               two_opt=True, window=TWO_OPT_WINDOW,
+               time_limit=TIME_LIMIT_SECONDS):
+    """规划访问所有点的顺序以缩短龙门移动时间。
+
+    先使用最近邻构造路径，再用2-opt改进（在`time_limit`秒后停止改进）。
+
+    参数:
+        points (list or numpy.ndarray): `app.search_points`的结果或N×2/N×3坐标。
+        start (tuple, optional): 起始位置 (x, y, z)。默认为 (0, 0, 0)。
+        speeds (tuple, optional): 每个轴的速度 (mm/s)。默认为 (1, 1, 1)。
+        safe_z (float, optional): 点之间移动时使用的Z安全高度。默认为 None。
+        two_opt (bool, optional): 是否运行2-opt改进。默认为 True。
+        window (int, optional): 2-opt考虑的最大片段长度。
+        time_limit (float, optional): 2-opt改进的时间上限（秒）。
+    返回：
+        按访问顺序排列的点索引数组。
+    """
+    deadline = time.time() + time_limit
+    coordinates = _as_coordinates(points)
+    if len(coordinates) == 0:
+        return np.zeros(0, dtype=int)
+    scaled = _scale(coordinates, speeds, safe_z)
+    start_point = _scale(_as_coordinates([start]), speeds, safe_z)[0]
+    order = _nearest_neighbour(scaled, start_point)
+    if two_opt and len(order) > 2:
+        order = _two_opt(scaled, start_point, order, window, deadline)
+    return order
+
+def route_time(points, order, start=(0, 0, 0), speeds=DEFAULT_SPEEDS,
+               safe_z=None):
+    """估计按给定顺序访问各点的移动时间（秒）。"""
+    coordinates = _as_coordinates(points)[order]
+    path = np.vstack([_as_coordinates([start]), coordinates])
+    scaled = path / np.asarray(speeds, dtype=float)
+    if safe_z is None:
+        return float(_edge_time(scaled[:-1], scaled[1:]).sum())
+    travel = _edge_time(scaled[:-1, :2], scaled[1:, :2]).sum()
+    lift = np.abs(path[:, 2] - safe_z) / float(speeds[2])
+    return float(travel + 2 * lift[1:].sum() + lift[0] - lift[-1])
+
+def plan_coordinates(points, start=(0, 0, 0), speeds=DEFAULT_SPEEDS,
+                     safe_z=None, clearance_radius=0, **kwargs):
+    """规划路径并生成`assemble_coordinate`坐标节点列表。
+
+    使用`safe_z`时，每一段先抬升到安全高度，平移后再下降到目标点；
+    XY距离不超过`clearance_radius`的相邻点之间直接移动。
+
+    参数:
+        points (list or numpy.ndarray): `app.search_points`的结果或坐标数组。
+        clearance_radius (float, optional): 无需抬升的最大XY距离。默认为 0。
+        其他参数同`plan_route`。
+    """
+    coordinates = _as_coordinates(points)
+    order = plan_route(coordinates, start, speeds, safe_z, **kwargs)
+    previous = _as_coordinates([start])[0].tolist()
+    route = []
+    for x, y, z in coordinates[order].tolist():
+        if safe_z is not None:
+            direct = max(abs(x - previous[0]), abs(y - previous[1])) \
+                <= clearance_radius
+            if not direct:
+                route.append(assemble_coordinate(
+                    previous[0], previous[1], safe_z))
+                route.append(assemble_coordinate(x, y, safe_z))
+        route.append(assemble_coordinate(x, y, z))
+        previous = (x, y, z)
+    return route
+
+def move_through(points, speed=100, offset=None, **kwargs):
+    """按规划的路径依次发送`move_absolute`命令。
+
+    参数:
+        points (list or numpy.ndarray): `app.search_points`的结果或坐标数组。
+        speed (int, optional): 最大速度的百分比。默认为 100。
+        offset (dict, optional): Celery 脚本 'coordinate' 节点。默认为零偏移。
+        其他参数同`plan_coordinates`。
+    """
+    if offset is None:
+        offset = assemble_coordinate(0, 0, 0)
+    return [move_absolute(location, speed, offset)
+            for location in plan_coordinates(points, **kwargs)]
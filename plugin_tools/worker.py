@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具：常驻插件工作进程。
+
+工作进程保持插件API管道、HTTP会话和缓存，按请求运行已注册的插件入口函数，
+避免每次运行都重新启动解释器和导入`plugin_tools`。
+
+    python -m plugin_tools.worker water=my_plugin.main:run
+
+    from plugin_tools import worker
+    worker.call('water', plugin_name='Water', config={'seconds': 5})
+'''
+
+from __future__ import print_function
+import io
+import os
+import sys
+import json
+import stat
+import time
+import socket
+import argparse
+import importlib
+import threading
+import traceback
+from contextlib import redirect_stdout
+from . import _CONFIGS
+from ._util import _encode_frame, _read_frame
+from .auxiliary import snake_case
+from .env import Env
+
+ENV = Env()
+DEFAULT_SOCKET_NAME = 'plugin_worker.sock'
+
+def default_address():
+    '''工作进程套接字的默认路径（插件数据目录或当前目录）。'''
+    return ENV.plugin_data_path(DEFAULT_SOCKET_NAME)
+
+def _load(target):
+    '从 `module:function` 字符串导入函数。'
+    module_name, _, function_name = target.partition(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+def _jsonable(value):
+    try:
+        json.dumps(value)
+    except (TypeError, ValueError):
+        return repr(value)
+    return value
+
+class WorkerHost(object):
+    '''运行已注册插件入口函数的常驻进程。
+
+    一次只运行一个入口函数。每次运行时注入请求中的环境变量和插件配置
+    （`get_config_value`/`load_config`读取这些值），运行结束后恢复环境
+    并清空配置缓存；输出、返回值、异常和`sys.exit`代码随响应返回。
+    套接字只允许当前用户连接（权限0600）。
+    '''
+
+    def __init__(self, address=None):
+        """
+        参数:
+            address (str, optional): Unix套接字路径。默认为`default_address()`。
+        """
+        self.address = address or default_address()
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._socket = None
+
+    def register(self, name, function=None):
+        """注册入口函数（也可以用作装饰器）。
+
+        参数:
+            name (str): 入口名称。
+            function (callable or str): 函数或 'module:function'。
+        """
+        if function is None:
+            def _decorator(decorated):
+                self.entries[name] = decorated
+                return decorated
+            return _decorator
+        if isinstance(function, str):
+            function = _load(function)
+        self.entries[name] = function
+        return function
+
+    def run(self, name, env=None, plugin_name=None, config=None, kwargs=None):
+        """运行一个入口函数。
+
+        参数:
+            name (str): 入口名称。
+            env (dict, optional): 本次运行的环境变量。
+            plugin_name (str, optional): 插件名称（配置的命名空间）。
+            config (dict, optional): {插件输入名称: 值}
+            kwargs (dict, optional): 传递给入口函数的参数。
+        返回：
+            {'result', 'output', 'seconds'}，失败时包含'error'或'exit_code'。
+        """
+        function = self.entries.get(name)
+        if function is None:
+            return {'error': 'Entry `{}` not registered.'.format(name)}
+        overrides = dict((key, str(value)) for key, value in (env or {}).items())
+        if plugin_name is not None:
+            prefix = snake_case(plugin_name) + '_'
+            for config_name, value in (config or {}).items():
+                overrides[prefix + config_name] = str(value)
+        response = {'result': None}
+        output = io.StringIO()
+        with self._lock:
+            saved = dict(os.environ)
+            os.environ.update(overrides)
+            _CONFIGS.clear()
+            start = time.time()
+            try:
+                with redirect_stdout(output):
+                    response['result'] = _jsonable(function(**(kwargs or {})))
+            except SystemExit as exit_exception:
+                response['exit_code'] = exit_exception.code
+            except Exception:
+                response['error'] = traceback.format_exc()
+            finally:
+                response['seconds'] = time.time() - start
+                os.environ.clear()
+                os.environ.update(saved)
+                _CONFIGS.clear()
+        response['output'] = output.getvalue()
+        return response
+
+    def handle(self, request):
+        '''处理一个请求字典（见`call`）。无效的请求不会修改环境。'''
+        if not isinstance(request, dict):
+            return {'error': 'Invalid request.'}
+        if request.get('command') == 'entries':
+            return {'result': sorted(self.entries)}
+        if request.get('entry') not in self.entries:
+            return {'error': 'Entry `{}` not registered.'.format(
+                request.get('entry'))}
+        if not all(isinstance(request.get(key), (dict, type(None)))
+                   for key in ['env', 'config', 'kwargs']):
+            return {'error': 'Invalid request.'}
+        return self.run(request.get('entry'), request.get('env'),
+                        request.get('plugin_name'), request.get('config'),
+                        request.get('kwargs'))
+
+    def _serve_connection(self, connection):
+        with connection:
+            while True:
+                try:
+                    request = _read_frame(connection)
+                except (OSError, ValueError):
+                    return
+                if request is None:
+                    return
+                connection.sendall(_encode_frame(self.handle(request)))
+
+    def start(self):
+        '''打开套接字（只删除当前用户留下的旧套接字）。'''
+        try:
+            status = os.lstat(self.address)
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(status.st_mode) \
+                    or status.st_uid != os.getuid():
+                raise FileExistsError(
+                    '{} exists and is not a worker socket.'.format(
+                        self.address))
+            os.remove(self.address)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o077)  # 创建时其他用户就不能连接
+        try:
+            self._socket.bind(self.address)
+        finally:
+            os.umask(umask)
+        os.chmod(self.address, 0o600)
+        self._socket.listen(8)
+        return self
+
+    def serve_forever(self):
+        '''接受连接，每个连接在一个线程中处理，直到`stop()`。'''
+        if self._socket is None:
+            self.start()
+        listening_socket = self._socket
+        while True:
+            try:
+                connection, _ = listening_socket.accept()
+            except OSError:  # stop()
+                return
+            thread = threading.Thread(target=self._serve_connection,
+                                      args=(connection,))
+            thread.daemon = True
+            thread.start()
+
+    def stop(self):
+        '''关闭套接字。'''
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)  # 唤醒accept()
+            except OSError:
+                pass
+            self._socket.close()
+            self._socket = None
+            if os.path.exists(self.address):
+                os.remove(self.address)
+
+def call(entry, address=None, env=None, plugin_name=None, config=None,
+         kwargs=None, timeout=None):
+    """请求工作进程运行入口函数。
+
+    参数:
+        entry (str): 入口名称。
+        address (str, optional): 工作进程套接字。默认为`default_address()`。
+        env (dict, optional): 本次运行的环境变量。
+        plugin_name (str, optional): 插件名称（配置的命名空间）。
+        config (dict, optional): {插件输入名称: 值}
+        kwargs (dict, optional): 传递给入口函数的参数。
+        timeout (float, optional): 等待秒数。默认为 None（一直等待）。
+    返回：
+        {'result', 'output', 'seconds'}，失败时包含'error'或'exit_code'。
+    """
+    request = {'entry': entry, 'env': env, 'plugin_name': plugin_name,
+               'config': config, 'kwargs': kwargs}
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.settimeout(timeout)
+    with connection:
+        connection.connect(address or default_address())
+        connection.sendall(_encode_frame(request))
+        return _read_frame(connection)
+
+def main(args=None):
+    '''命令行：python -m plugin_tools.worker [--address PATH] name=module:function ...'''
+    parser = argparse.ArgumentParser(description='Run a plugin worker host.')
+    parser.add_argument('--address', default=None)
+    parser.add_argument('entries', nargs='+', metavar='name=module:function')
+    options = parser.parse_args(args)
+    host = WorkerHost(options.address)
+    for entry in options.entries:
+        name, _, target = entry.partition('=')
+        host.register(name, target)
+    host.start()
+    print('Worker listening on {}'.format(host.address), file=sys.stderr)
+    try:
+        host.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        host.stop()
+
+if __name__ == '__main__':
+    main()
@@ -26,6 +26,8 @@ if __name__ == '__main__':
           author_email='plugin.tools@funfarm.fun',
           packages=['plugin_tools'],
           include_package_data=True,
+          # batch、history、sampler、spatial和waypoints需要NumPy。
+          extras_require={'numpy': ['numpy']},
           classifiers=[
               'Development Status :: 3 - Alpha',
               'License :: OSI Approved :: MIT License',
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：本地Funfarm Web应用替代服务器。
+
+提供客户端使用的`/api/`终结点（points、points/search、logs、sequences、
+tools、device），可以配置延迟、记录大小、限速和ETag。
+生成的JWT令牌使`app._get_required_info`无需修改即可使用本服务器。
+
+    with AppServer(points=1000, latency=0.01) as server:
+        os.environ['LARSEN_API_TOKEN'] = server.token
+        app.search_points({'pointer_type': 'Plant'})
+'''
+
+from __future__ import print_function
+import json
+import time
+import base64
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESOURCES = ['points', 'logs', 'sequences', 'tools']
+TIMESTAMP = '2024-01-01T00:00:00.000Z'
+
+def _encode(data):
+    return base64.urlsafe_b64encode(
+        json.dumps(data).encode('utf-8')).decode('utf-8').rstrip('=')
+
+def make_token(server, device_id='device_1'):
+    '''生成（未签名的）API令牌，`iss`为服务器地址。'''
+    header = _encode({'alg': 'none', 'typ': 'JWT'})
+    payload = _encode({'iss': '//{}'.format(server), 'bot': device_id,
+                       'sub': 1, 'exp': int(time.time()) + 3600})
+    return '{}.{}.'.format(header, payload)
+
+def _matches(record, search_payload):
+    for key, value in search_payload.items():
+        if key == 'meta' and isinstance(value, dict):
+            meta = record.get('meta') or {}
+            if any(meta.get(k) != v for k, v in value.items()):
+                return False
+        elif record.get(key) != value:
+            return False
+    return True
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        'Silence the default request logging.'
+
+    def _send(self, status_code, data=None, headers=None):
+        body = b'' if data is None else json.dumps(data).encode('utf-8')
+        self.send_response(status_code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if data is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _payload(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length).decode('utf-8'))
+
+    def _handle(self):
+        app_server = self.server.app_server
+        payload = self._payload()
+        retry_after = app_server.admit()
+        if retry_after is not None:
+            self._send(429, {'error': 'Too many requests.'},
+                       {'Retry-After': '{:g}'.format(retry_after)})
+            return
+        time.sleep(app_server.latency)
+        if self.headers.get('Authorization') != 'Bearer ' + app_server.token:
+            self._send(401, {'auth': 'Bad token.'})
+            return
+        parts = self.path.split('?')[0].strip('/').split('/')
+        if not parts or parts[0] != 'api':
+            self._send(404, {'error': 'Not found.'})
+            return
+        status_code, data = app_server.dispatch(self.command, parts[1:],
+                                                payload)
+        cacheable = self.command in ['GET', 'HEAD'] or parts[-1] == 'search'
+        if status_code == 200 and app_server.etags and cacheable:
+            etag = '"{}"'.format(hashlib.sha1(
+                json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest())
+            if self.headers.get('If-None-Match') == etag:
+                self._send(304, headers={'ETag': etag})
+                return
+            self._send(status_code, data, {'ETag': etag})
+            return
+        self._send(status_code, data)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+class AppServer(object):
+    '''内存中的Web应用替代服务器（在后台线程中运行）。'''
+
+    def __init__(self, points=0, logs=0, sequences=0, tools=0, latency=0,
+                 record_size=0, rate_limit=None, burst=10, etags=True,
+                 port=0):
+        """
+        参数:
+            points, logs, sequences, tools (int, optional): 生成的记录数。
+            latency (float, optional): 每个请求的延迟秒数。默认为 0。
+            record_size (int, optional): 每条生成的记录附加的字节数。
+            rate_limit (float, optional): 每秒最大请求数，超过时返回429
+                和`Retry-After`。默认为 None（不限速）。
+            burst (int, optional): 最大连续请求数。默认为 10。
+            etags (bool, optional): GET和搜索响应是否带有ETag（支持304）。
+            port (int, optional): 端口。默认为 0（任意空闲端口）。
+        """
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.etags = etags
+        self.counts = {}  # {(method, endpoint): count}
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.time()
+        self._next_id = 1
+        self.data = dict((resource, {}) for resource in RESOURCES)
+        self.device = {'id': 1, 'name': 'Funfarm', 'timezone': 'UTC',
+                       'fbos_version': '15.4.0', 'updated_at': TIMESTAMP}
+        padding = 'x' * record_size
+        for i in range(points):
+            self.create('points', {
+                'pointer_type': ['Plant', 'GenericPointer', 'ToolSlot'][i % 3],
+                'name': 'point {}'.format(i), 'x': i % 100 * 10,
+                'y': i // 100 * 10, 'z': 0, 'radius': 25,
+                'plant_stage': 'planned', 'planting_slug': 'mint',
+                'meta': {'padding': padding} if padding else {}})
+        for i in range(logs):
+            self.create('logs', {'message': 'log {} {}'.format(i, padding),
+                                 'type': ['info', 'warn'][i % 2]})
+        for i in range(sequences):
+            self.create('sequences', {'name': 'sequence {}'.format(i),
+                                      'body': [], 'padding': padding})
+        for i in range(tools):
+            self.create('tools', {'name': 'tool {}'.format(i)})
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self._server.daemon_threads = True
+        self._server.app_server = self
+        self.address = 'localhost:{}'.format(self._server.server_address[1])
+        self.url = 'http://{}/api/'.format(self.address)
+        self.token = make_token(self.address)
+        self._thread = None
+
+    def start(self):
+        '''在后台线程中启动服务器。'''
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        '''停止服务器。'''
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def get_info(self):
+        '''替代`app._get_required_info`。'''
+        return {'token': self.token, 'url': self.url}
+
+    def count(self, method, endpoint):
+        '''某个终结点收到的请求数。'''
+        return self.counts.get((method, endpoint), 0)
+
+    def admit(self):
+        '''令牌桶限速：允许时返回None，否则返回需要等待的秒数。'''
+        with self._lock:
+            if self.rate_limit is None:
+                return None
+            now = time.time()
+            self._tokens = min(self.burst, self._tokens
+                               + (now - self._updated) * self.rate_limit)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / self.rate_limit
+
+    def create(self, resource, record):
+        '''添加记录（设置id、created_at和updated_at）。'''
+        with self._lock:
+            record = dict(record, id=self._next_id, created_at=TIMESTAMP,
+                          updated_at=TIMESTAMP)
+            self._next_id += 1
+            self.data[resource][record['id']] = record
+        return record
+
+    def update(self, resource, _id, changes):
+        '''修改记录（并更新updated_at）。'''
+        with self._lock:
+            record = self.data[resource][_id]
+            record.update(changes)
+            record['updated_at'] = '{:.6f}'.format(time.time())
+        return record
+
+    def dispatch(self, method, parts, payload):
+        '''处理`/api/`之后的路径，返回 (status_code, data)。'''
+        with self._lock:
+            key = (method, '/'.join(parts))
+            self.counts[key] = self.counts.get(key, 0) + 1
+        if parts == ['device']:
+            if method in ['PATCH', 'PUT'] and isinstance(payload, dict):
+                self.device.update(payload)
+            return 200, self.device
+        if not parts or parts[0] not in self.data:
+            return 404, {'error': 'Not found.'}
+        resource = self.data[parts[0]]
+        if len(parts) == 2 and parts[1] == 'search':
+            return 200, [r for r in list(resource.values())
+                         if _matches(r, payload or {})]
+        if len(parts) == 1:
+            if method == 'GET':
+                return 200, list(resource.values())
+            if method == 'POST':
+                if not isinstance(payload, dict):
+                    return 422, {'error': 'Invalid payload.'}
+                return 200, self.create(parts[0], payload)
+            return 404, {'error': 'Not found.'}
+        try:
+            _id = int(parts[1])
+            record = resource[_id]
+        except (ValueError, KeyError):
+            return 404, {'error': 'Not found.'}
+        if method == 'GET':
+            return 200, record
+        if method in ['PATCH', 'PUT']:
+            return 200, self.update(parts[0], _id, payload or {})
+        if method == 'DELETE':
+            with self._lock:
+                del resource[_id]
+            return 200, {}
+        return 404, {'error': 'Not found.'}
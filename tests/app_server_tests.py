@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：使用本地替代服务器测试和测量web应用程序客户端'''
+
+from __future__ import print_function
+import os
+import copy
+import time
+import threading
+from plugin_tools import app, sessions
+from plugin_tools.mirror import Mirror
+from app_server import AppServer
+
+TOKEN_VARIABLE = 'LARSEN_API_TOKEN'
+
+def _timed(label, function, count=1):
+    start = time.time()
+    for _ in range(count):
+        result = function()
+    elapsed = time.time() - start
+    print('{}: {:.1f} ms'.format(label, 1000 * elapsed / count))
+    return result
+
+def _test_requests(server):
+    # 生成的令牌：`_get_required_info`从环境变量中解析服务器地址。
+    assert app._get_required_info()['url'] == server.url
+    assert len(app.search_points({'pointer_type': 'Plant'})) == 334
+    tool = app.post('tools', {'name': 'new tool'})
+    assert app.get('tools', tool['id'])['name'] == 'new tool'
+    app.patch('tools', tool['id'], {'name': 'edited tool'})
+    assert app.get('tools', tool['id'])['name'] == 'edited tool'
+    app.delete('tools', tool['id'])
+    assert app.get('tools', tool['id'], return_dict=True)['status_code'] == 404
+    assert app.get_property('device', 'name') == 'Funfarm'
+    assert len(list(app.iter_search_logs({'type': 'warn'}))) == 50
+
+def _test_cache(server):
+    app.configure_cache()
+    before = app.cache_stats()['revalidated']
+    app.get('points')
+    app.get('points')  # 没有TTL：使用ETag重新验证
+    assert app.cache_stats()['revalidated'] == before + 1
+    requests = server.count('GET', 'sequences')
+    app.get('sequences')
+    app.get('sequences')  # TTL内：不请求
+    assert server.count('GET', 'sequences') == requests + 1
+
+def _slow_dispatch(server, method, before=0, after=0):
+    '让服务器在处理`method`请求之前或之后（已读取数据）等待。'
+    dispatch = server.dispatch
+    def _dispatch(request_method, parts, payload):
+        if request_method == method:
+            time.sleep(before)
+        status_code, data = dispatch(request_method, parts, payload)
+        if request_method == method:
+            data = copy.deepcopy(data)  # 响应是读取时的数据
+            time.sleep(after)
+        return status_code, data
+    server.dispatch = _dispatch
+
+def _concurrently(first, second):
+    '在后台线程中调用`first`，稍后调用`second`，等待两者完成。'
+    thread = threading.Thread(target=first)
+    thread.start()
+    time.sleep(0.05)
+    second()
+    thread.join()
+
+def _test_cache_write_race(server):
+    app.configure_cache()
+    tool_id = app.get('tools')[0]['id']
+    names = lambda: [t['name'] for t in app.get('tools') if t['id'] == tool_id]
+    try:
+        # 修改之前开始的GET在修改完成之后才收到（旧的）响应：不保存。
+        _slow_dispatch(server, 'GET', after=0.2)
+        _concurrently(lambda: app.get('tools'),
+                      lambda: app.put('tools', tool_id, {'name': 'renamed'}))
+        del server.dispatch
+        assert names() == ['renamed']
+        # 修改期间的GET读取旧数据：修改完成后失效。
+        _slow_dispatch(server, 'PUT', before=0.2)
+        _concurrently(lambda: app.put('tools', tool_id, {'name': 'tool 0'}),
+                      lambda: app.get('tools'))
+        del server.dispatch
+        assert names() == ['tool 0']
+    finally:
+        server.__dict__.pop('dispatch', None)
+
+def _test_single_flight(server):
+    # 缓存关闭时，相同的并发GET仍然只发送一次并共享解码结果。
+    app.configure_cache(enabled=False)
+    server.latency = 0.1
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        app.get('device'))) for _ in range(10)]
+    requests = server.count('GET', 'device')
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert server.count('GET', 'device') == requests + 1
+        assert results == [server.device] * 10
+        app.get('device')  # 没有进行中的请求时重新发送
+        assert server.count('GET', 'device') == requests + 2
+        server.latency = 0
+        # 修改完成后的GET不加入修改之前开始的GET（会得到旧数据）。
+        tool_id = app.get('tools')[0]['id']
+        _slow_dispatch(server, 'GET', after=0.2)
+        results = []
+        _concurrently(lambda: app.get('tools'), lambda: (
+            app.patch('tools', tool_id, {'name': 'renamed'}),
+            results.append(app.get('tools'))))
+        assert [t['name'] for t in results[0] if t['id'] == tool_id] == [
+            'renamed']
+        app.patch('tools', tool_id, {'name': 'tool 0'})
+    finally:
+        server.__dict__.pop('dispatch', None)
+        server.latency = 0
+        app.configure_cache()
+    print('10 concurrent GETs, 1 HTTP request')
+
+def _test_rate_limit(server):
+    server.rate_limit = 50
+    app.configure_scheduler(backoff=0.05)
+    try:
+        start = time.time()
+        responses = app.post_many('logs', [{'message': str(i)}
+                                           for i in range(40)])
+        elapsed = time.time() - start
+        stats = app.scheduler_stats()
+    finally:
+        server.rate_limit = None
+        app.configure_scheduler()
+    assert all(r['status_code'] == 200 for r in responses)
+    # 接近服务器限速（10个突发 + 30个/50每秒 ≈ 0.6秒），速率不会崩溃。
+    assert elapsed < 3, elapsed
+    assert stats['rate'] is None or stats['rate'] >= 10, stats
+    print('40 rate-limited POSTs in {:.2f}s, scheduler stats: {}'.format(
+        elapsed, stats))
+
+def _test_bulk(server):
+    ids = [app.post('points', {'name': str(i)})['id'] for i in range(3)]
+    for kwargs in [{'ids': ids, 'payloads': [{}]},
+                   {'ids': ids, 'chunk_size': 2}]:
+        try:
+            app.bulk_request('DELETE', 'points', **kwargs)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(kwargs)
+    assert all(_id in server.data['points'] for _id in ids)
+    responses = app.delete_many('points', ids, workers=2)
+    assert [r['status_code'] for r in responses] == [200] * 3
+    assert not any(_id in server.data['points'] for _id in ids)
+
+def _test_mirror(server):
+    mirror = Mirror(':memory:', get_info=app._get_required_info)
+    mirror.sync(['points'])
+    server.update('points', 1, {'name': 'renamed'})
+    assert mirror.sync(['points']) == {'points': 1}
+    assert mirror.search_points({'name': 'renamed'})[0]['id'] == 1
+    revalidated = app.cache_stats()['revalidated']
+    assert mirror.sync(['points']) == {'points': 0}  # 没有变化：304
+    assert app.cache_stats()['revalidated'] == revalidated + 1
+    mirror.close()
+
+def _benchmarks(server):
+    app.configure_cache(enabled=False)
+    _timed('GET tools (pooled connection)', lambda: app.get('tools'), 50)
+    _timed('POST points/search (1000 points)',
+           lambda: app.search_points({'pointer_type': 'Plant'}), 10)
+    _timed('streamed points/search (1000 points)', lambda: list(
+        app.iter_search_points({'pointer_type': 'Plant'})), 10)
+    app.configure_cache()
+    _timed('GET points (ETag revalidation)', lambda: app.get('points'), 10)
+    tool_ids = [tool['id'] for tool in app.get('tools')]
+    server.latency = 0.02
+    _timed('10 tool updates, sequential', lambda: [
+        app.patch('tools', _id, {'name': 'tool'}) for _id in tool_ids])
+    _timed('10 tool updates, concurrent', lambda: app.update_many(
+        'tools', dict((_id, {'name': 'tool'}) for _id in tool_ids)))
+    server.latency = 0
+
+def run_tests():
+    '运行本地服务器测试和基准测试。'
+    original_token = os.environ.get(TOKEN_VARIABLE)
+    with AppServer(points=1000, logs=100, sequences=20, tools=10) as server:
+        os.environ[TOKEN_VARIABLE] = server.token
+        try:
+            _test_requests(server)
+            _test_cache(server)
+            _test_cache_write_race(server)
+            _test_single_flight(server)
+            _test_rate_limit(server)
+            _test_bulk(server)
+            _test_mirror(server)
+            _benchmarks(server)
+        finally:
+            sessions.close()
+            if original_token is None:
+                del os.environ[TOKEN_VARIABLE]
+            else:
+                os.environ[TOKEN_VARIABLE] = original_token
+
+if __name__ == '__main__':
+    run_tests()
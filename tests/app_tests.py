@@ -39,9 +39,15 @@ def run_tests(app_login):
                            name='test', get_info=app_login)
     print(PLANT2)
     print(app.delete('points', PLANT2['id'], get_info=app_login))
+    PLANTS = app.add_plants([{'x': 10 * i, 'y': 10} for i in range(5)],
+                            get_info=app_login)
+    print(PLANTS)
+    print(app.delete_many('points', [p['json']['id'] for p in PLANTS],
+                          get_info=app_login))
     app.post('sequences', {'name': 'test', 'body': []}, get_info=app_login)
     app.post('sequences', {'name': u'test \u2713', 'body': []},
              get_info=app_login)
     print(app.find_sequence_by_name(name=u'test \u2713', get_info=app_login))
     print(app.find_sequence_by_name(name='test', get_info=app_login))
+    print(app.get_sequence_index(app_login).find('TEST', prefix=True))
     print()
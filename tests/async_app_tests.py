@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：Web应用（asyncio）'''
+
+from __future__ import print_function
+import time
+import asyncio
+import threading
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+from plugin_tools import async_app
+
+ACTIVE = {'now': 0, 'max': 0}
+LOCK = threading.Lock()
+
+def _mock_request(method, endpoint, _id=None, payload=None,
+                  return_dict=False, get_info=None):
+    with LOCK:
+        ACTIVE['now'] += 1
+        ACTIVE['max'] = max(ACTIVE['max'], ACTIVE['now'])
+    time.sleep(0.05)
+    with LOCK:
+        ACTIVE['now'] -= 1
+    response = {'method': method, 'endpoint': endpoint, 'payload': payload}
+    if return_dict:
+        return {'json': response, 'status_code': 200}
+    return response
+
+@mock.patch('plugin_tools.app.request', _mock_request)
+def run_tests():
+    '运行asyncio Web应用测试。'
+    async_app.set_concurrency(3)
+    async def _main():
+        return await asyncio.gather(
+            async_app.log('hi'),
+            async_app.search_points({'pointer_type': 'Plant'}),
+            async_app.get('tools', return_dict=True),
+            *[async_app.delete('points', i) for i in range(6)])
+    begin = time.time()
+    results = asyncio.run(_main())
+    elapsed = time.time() - begin
+    assert results[0] == {'method': 'POST', 'endpoint': 'logs',
+                          'payload': {'message': 'hi', 'type': 'info'}}
+    assert results[1]['endpoint'] == 'points/search'
+    assert results[2]['status_code'] == 200
+    assert ACTIVE['max'] == 3, ACTIVE
+    print('9 requests, concurrency {}: {:.2f}s'.format(ACTIVE['max'], elapsed))
+    async_app.set_concurrency(async_app.CONCURRENCY)
+
+if __name__ == '__main__':
+    run_tests()
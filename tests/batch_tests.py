@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：批量命令构建'''
+
+from __future__ import print_function
+import json
+import numpy as np
+from plugin_tools import batch, device
+from plugin_api import no_plugin_api
+
+def _test_matches_scalar_builders():
+    locations = np.arange(30).reshape(10, 3)
+    commands = batch.move_absolute_commands(locations, speed=50)
+    assert len(commands) == 10
+    expected = device.move_absolute(
+        device.assemble_coordinate(27, 28, 29), 50,
+        device.assemble_coordinate(0, 0, 0))['command']
+    assert commands[-1] == expected, commands[-1]
+    # 与`device`命令相同，坐标是整数（四舍五入）。
+    location = commands[-1]['args']['location']['args']
+    assert [type(value) for value in location.values()] == [int] * 3
+    assert batch.assemble_coordinates([[0.4, 1.6, -2.5]])[0]['args'] == {
+        'x': 0, 'y': 2, 'z': -2}
+    assert batch.move_relative_commands([[1.7, 0, 0]])[0]['args']['x'] == 2
+    commands = batch.write_pin_commands(np.arange(3), [1, 0, 1])
+    assert commands[2] == device.write_pin(2, 1, 0)['command']
+    print('bulk commands match scalar builders')
+
+def _test_invalid_values():
+    assert batch.write_pin_commands([1, 70], 1) is None
+    assert batch.move_relative_commands([[0, 0, 0]] * 2, [50, 0]) is None
+    assert batch.set_servo_angle_commands(4, [0, 181]) is None
+    assert batch.set_servo_angle_commands([3], 0) is None
+    assert batch.read_pin_commands([1, 2], pin_modes=2) is None
+    assert batch.move_absolute_commands([[0, np.nan, 0]]) is None
+    assert batch.move_absolute_commands([[0, 0, 0]], offsets=(1e9, 0, 0)) \
+        is None
+    assert batch.move_relative_commands([[np.inf, 0, 0]]) is None
+    assert batch.assemble_coordinates([[0, 0, -1e6]]) is None
+    print('invalid values rejected')
+
+def _test_frames():
+    frames = batch.encode_frames(batch.read_pin_commands([1, 2], 'x'))
+    rpc_id, frame = frames[1]
+    payload = json.loads(frame[10:].decode())
+    assert payload['args']['label'] == rpc_id
+    assert payload['body'][0]['args']['pin_number'] == 2
+    print('frame: {}'.format(frame))
+
+def run_tests():
+    '运行批量命令构建测试。'
+    with no_plugin_api():
+        _test_matches_scalar_builders()
+        _test_invalid_values()
+        _test_frames()
+
+if __name__ == '__main__':
+    run_tests()
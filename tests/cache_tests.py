@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：Web应用响应缓存'''
+
+from __future__ import print_function
+from plugin_tools.cache import ResponseCache
+
+class MockResponse(object):
+    'Mocked requests response class.'
+    def __init__(self, content, headers=None):
+        self.content = content
+        self.headers = headers or {}
+
+def _test_ttl_and_validators():
+    cache = ResponseCache(ttls={'sequences': 60})
+    key = cache.key('GET', 'url/sequences', None, 'token')
+    assert cache.lookup(key) == (False, None)
+    cache.store(key, 'sequences', MockResponse(b'[]'))
+    fresh, entry = cache.lookup(key)
+    assert fresh and entry['content'] == b'[]'
+    tools_key = cache.key('GET', 'url/tools/1', None, 'token')
+    cache.store(tools_key, 'tools/1', MockResponse(b'{}'))
+    assert cache.stats()['entries'] == 1  # 没有TTL和验证头：不保存
+    cache.store(tools_key, 'tools/1', MockResponse(b'{}', {'ETag': '"a"'}))
+    fresh, entry = cache.lookup(tools_key)
+    assert not fresh
+    assert cache.validators(entry) == {'If-None-Match': '"a"'}
+    print('cache stats: {}'.format(cache.stats()))
+
+def _test_invalidation():
+    cache = ResponseCache(default_ttl=60)
+    assert cache.cacheable('POST', 'points/search')
+    assert not cache.cacheable('POST', 'points')
+    search_key = cache.key('POST', 'url/points/search', {'x': 1}, 'token')
+    cache.store(search_key, 'points/search', MockResponse(b'[]'))
+    sequence_key = cache.key('GET', 'url/sequences', None, 'token')
+    cache.store(sequence_key, 'sequences', MockResponse(b'[]'))
+    cache.invalidate('points')
+    assert cache.lookup(search_key) == (False, None)
+    assert cache.lookup(sequence_key)[0]
+    cache.store(sequence_key, 'sequences',
+                MockResponse(b'[]', {'ETag': '"s"'}))
+    cache.expire('sequences')  # 过期但保留验证头
+    fresh, entry = cache.lookup(sequence_key)
+    assert not fresh
+    assert cache.validators(entry) == {'If-None-Match': '"s"'}
+    print('cache stats: {}'.format(cache.stats()))
+
+def _test_generations():
+    cache = ResponseCache(default_ttl=60)
+    key = cache.key('GET', 'url/tools', None, 'token')
+    generation = cache.generation('tools')
+    cache.invalidate('tools/1')  # 请求期间修改了资源
+    cache.store(key, 'tools', MockResponse(b'[]'), generation)
+    assert cache.lookup(key) == (False, None)
+    cache.store(key, 'tools', MockResponse(b'[]'), cache.generation('tools'))
+    assert cache.lookup(key)[0]
+    generation = cache.generation('sequences')
+    cache.invalidate()
+    assert cache.generation('sequences') != generation
+    # POST搜索只按TTL缓存，不发送条件请求头（失败时是412而不是304）。
+    search_key = cache.key('POST', 'url/points/search', {}, 'token')
+    cache.store(search_key, 'points/search',
+                MockResponse(b'[]', {'ETag': '"p"'}))
+    assert cache.validators(cache.lookup(search_key)[1]) == {}
+    cache.ttls['points'] = 0
+    cache.invalidate()
+    cache.store(search_key, 'points/search',
+                MockResponse(b'[]', {'ETag': '"p"'}))
+    assert cache.lookup(search_key) == (False, None)
+
+def run_tests():
+    '运行响应缓存测试。'
+    _test_ttl_and_validators()
+    _test_invalidation()
+    _test_generations()
+
+if __name__ == '__main__':
+    run_tests()
@@ -25,6 +25,17 @@ def run_pin_value_tests():
     _test_get_value(device.get_pin_value, 14, None)
     _test_get_value(device.get_pin_value, 13, 1)
 
+def run_pin_values_tests():
+    '运行 read_pins 测试'
+    def _get_pins():
+        return {'13': {'value': 1}, '54': {'value': 512}}
+    result = device.read_pins([13, 54, 14], _get_pins=_get_pins)
+    assert result['values'] == {13: 1, 54: 512, 14: None}
+    assert isinstance(result['timestamp'], float)
+    print('pin values {}'.format(result['values']))
+    assert device.read_pins([13, 70], _get_pins=_get_pins) is None
+
 if __name__ == '__main__':
     run_position_tests()
     run_pin_value_tests()
+    run_pin_values_tests()
@@ -62,6 +62,8 @@ def run_tests(TEST, app_login):
          'expected': {'log': ['F61 P4 V1']}},
         {'command': device.set_user_env,
          'kwargs': {'key': 'test_key', 'value': 1}},
+        {'command': device.set_user_env,
+         'kwargs': {'key': {'test_key_1': 1, 'test_key_2': 'two'}}},
         {'command': device.sync, 'kwargs': {},
          'expected': {'status': [{
              'keys': ['informational_settings', 'sync_status'],
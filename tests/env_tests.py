@@ -3,6 +3,7 @@
 '''插件工具测试：环境'''
 
 from __future__ import print_function
+import os
 from plugin_tools.env import Env
 
 def _version_compare_test(current, required, expected):
@@ -26,8 +27,31 @@ OK = [
     [7], [6],
     ]
 
+def _capabilities_test():
+    ENV = Env()
+    ENV.lsos_version = '7.0.0'
+    capabilities = ENV.capabilities
+    assert ENV.capabilities is capabilities  # 只计算一次
+    assert not capabilities.v2 and not ENV.use_v2()
+    assert 'read_pin' in capabilities.no_rpc_kinds
+    ENV.lsos_version = '8.1.0'
+    assert ENV.capabilities.v2 and ENV.use_v2()
+    assert not ENV.capabilities.no_rpc_kinds
+    print('8.1.0 capabilities: {}'.format(vars(ENV.capabilities)))
+
+def _plugin_data_path_test():
+    ENV = Env()
+    ENV.plugin_data_dir = os.path.join('data', 'plugin')
+    assert ENV.plugin_data_path('a.sqlite') == os.path.join(
+        'data', 'plugin', 'a.sqlite')
+    ENV.plugin_data_dir = None
+    assert ENV.plugin_data_path('a.sqlite') == os.path.join(
+        os.getcwd(), 'a.sqlite')
+
 def run_tests():
     '运行环境测试。'
+    _capabilities_test()
+    _plugin_data_path_test()
     for requirement_met in OK:
         _version_compare_test('7.0.1', requirement_met, True)
     for requirement_not_met in LESS:
@@ -3,8 +3,11 @@
 '''插件工具测试：get_config_value'''
 
 from __future__ import print_function
+import io
 import os
-from plugin_tools import get_config_value
+from contextlib import redirect_stdout
+from plugin_tools import (get_config_value, load_config, set_config_value,
+                          set_config_values, set_user_env)
 
 def _test_get_config(plugin, config, type_, expected):
     def _get_state():
@@ -19,8 +22,56 @@ def _test_get_config(plugin, config, type_, expected):
     print('get_config_value result {} == {}'.format(
         repr(received), repr(expected)))
 
+def _test_load_config():
+    reads = []
+    def _get_manifest(plugin_name):
+        reads.append(plugin_name)
+        return {'config': {
+            '1': {'name': 'twenty', 'value': 20},
+            '2': {'name': 'label', 'value': 'default label'},
+            '3': {'name': 'enabled', 'value': 'true'}}}
+    os.environ['load_plugin_enabled'] = 'false'
+    os.environ['load_plugin_speed'] = '2.5'
+    schema = {'twenty': int, 'label': str, 'enabled': bool, 'speed': float}
+    config = load_config('Load Plugin', schema, _get_manifest=_get_manifest)
+    expected = {'twenty': 20, 'label': 'default label', 'enabled': False,
+                'speed': 2.5}
+    assert config == expected, config
+    assert load_config('Load Plugin', schema,
+                       _get_manifest=_get_manifest) == expected
+    assert reads == ['Load Plugin']  # 缓存：只读取一次
+    config = load_config('Load Plugin', _get_manifest=_get_manifest)
+    assert config == {'twenty': 20, 'label': 'default label',
+                      'enabled': 'false'}, config
+    try:
+        load_config('Load Plugin', {'missing': int}, _get_manifest=_get_manifest)
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('Missing config should raise KeyError.')
+    print('load_config result {}'.format(expected))
+
+def _test_set_config_values():
+    sent = set_config_values('Plugin Name', {'one': 1, 'two': 'two'})
+    assert sent['command'] == {'kind': 'set_user_env', 'args': {}, 'body': [
+        {'kind': 'pair', 'args': {'label': 'plugin_name_one', 'value': '1'}},
+        {'kind': 'pair', 'args': {'label': 'plugin_name_two', 'value': 'two'}},
+        ]}, sent['command']
+    set_config_value('Plugin Name', 'one', None)  # 与之前相同
+    sent = set_user_env('plugin_name_one', None)
+    assert sent['command']['body'] == [
+        {'kind': 'pair', 'args': {'label': 'plugin_name_one', 'value': 'None'}},
+        ], sent['command']
+    output = io.StringIO()
+    with redirect_stdout(output):  # 缺少值：报告错误，不组装命令
+        assert set_user_env.__wrapped__('plugin_name_one') is None
+    assert 'plugin_name_one' in output.getvalue()
+    print('set_config_values sent {} pairs'.format(len(sent['command']['body'])))
+
 def run_tests():
     '运行get_config_value测试。'
+    _test_set_config_values()
+    _test_load_config()
     os.environ['plugin_name_int_input'] = '10'
     os.environ['plugin_name_str_input'] = 'ten'
     _test_get_config('plugin_name', 'int_input', None, 10)
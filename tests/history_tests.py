@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：持久化传感器历史记录'''
+
+from __future__ import print_function
+import os
+import shutil
+import tempfile
+import numpy as np
+from plugin_tools.history import SensorHistory
+
+def _test_append_and_query(path):
+    history = SensorHistory(path, max_records=5)
+    for i in range(12):
+        history.append(float(i), 54 + i % 2, i * 10)
+    assert len(history) == 5
+    assert history.records()['timestamp'].tolist() == [7, 8, 9, 10, 11]
+    view = history.query(8, 10)
+    assert view['value'].tolist() == [80, 90]
+    assert np.shares_memory(view, history.records())
+    assert history.query(pin=55)['timestamp'].tolist() == [7, 9, 11]
+    history.extend(np.arange(12, 20), 54, np.arange(8))
+    assert history.records()['timestamp'].tolist() == [15, 16, 17, 18, 19]
+    try:
+        history.append(0, 54, 0)
+    except ValueError:
+        pass
+    else:
+        assert False, 'decreasing timestamp accepted'
+    history.close()
+    print('records kept: {}'.format(history.max_records))
+
+def _test_reopen(path):
+    history = SensorHistory(path, max_records=100)
+    assert history.max_records == 5
+    assert history.last_timestamp() == 19
+    assert history.query(17)['value'].tolist() == [5, 6, 7]
+    history.close()
+    print('history survived reopening: {}'.format(path))
+
+def run_tests():
+    '运行持久化传感器历史记录测试。'
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'history.bin')
+    try:
+        _test_append_and_query(path)
+        _test_reopen(path)
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    run_tests()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：导入时间'''
+
+from __future__ import print_function
+import os
+import sys
+import json
+import subprocess
+from plugin_api import environment_without_plugin_api
+
+# 导入`plugin_tools`的时间预算（秒），可以用环境变量覆盖。
+IMPORT_BUDGET_SECONDS = float(
+    os.getenv('PLUGIN_TOOLS_IMPORT_BUDGET_SECONDS', '0.05'))
+REPEAT = 5
+
+_MEASURE = '''
+import sys, time, json
+start = time.perf_counter()
+import plugin_tools
+elapsed = time.perf_counter() - start
+loaded = 'requests' in sys.modules
+plugin_tools.get_config_value('plugin', 'input', _get_state=lambda: {})
+print(json.dumps({'seconds': elapsed, 'requests_on_import': loaded,
+                  'requests_for_config': 'requests' in sys.modules}))
+'''
+
+def _measure():
+    '在新的解释器中测量导入时间。'
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # 子进程中不使用设备插件API（其他测试可能设置了这些变量）。
+    environment = environment_without_plugin_api()
+    environment['plugin_input'] = '1'
+    environment['PYTHONPATH'] = os.pathsep.join(
+        [package_dir] + [p for p in [environment.get('PYTHONPATH')] if p])
+    output = subprocess.check_output(
+        [sys.executable, '-c', _MEASURE], env=environment)
+    return json.loads(output.decode('utf-8').strip().split('\n')[-1])
+
+def run_tests():
+    '运行导入时间测试。'
+    results = [_measure() for _ in range(REPEAT)]
+    seconds = min(result['seconds'] for result in results)
+    assert not any(result['requests_on_import'] for result in results)
+    assert not any(result['requests_for_config'] for result in results)
+    assert seconds < IMPORT_BUDGET_SECONDS, \
+        'import took {:.1f} ms (budget {:.1f} ms)'.format(
+            1000 * seconds, 1000 * IMPORT_BUDGET_SECONDS)
+    print('import plugin_tools: {:.1f} ms (budget {:.1f} ms)'.format(
+        1000 * seconds, 1000 * IMPORT_BUDGET_SECONDS))
+
+if __name__ == '__main__':
+    run_tests()
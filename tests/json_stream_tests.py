@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：增量JSON数组解析'''
+
+from __future__ import print_function
+import json
+import random
+from plugin_tools._json_stream import iter_json_array
+
+RECORDS = [{'id': i, 'message': u'✓' * (i % 7), 'meta': {'x': [i, None]}}
+           for i in range(500)] + [1234567, -1.5e3, True, None, 'text']
+
+def _chunks(raw, count):
+    cuts = sorted(random.sample(range(1, len(raw)), count))
+    return [raw[a:b] for a, b in zip([0] + cuts, cuts + [len(raw)])]
+
+def _test_chunk_boundaries():
+    raw = json.dumps(RECORDS).encode('utf-8')
+    random.seed(0)
+    for count in [1, 10, 1000, len(raw) - 1]:
+        assert list(iter_json_array(_chunks(raw, count))) == RECORDS
+    assert list(iter_json_array([b' [ ] '])) == []
+    print('{} records parsed across chunk boundaries'.format(len(RECORDS)))
+
+def _test_invalid():
+    for invalid in [b'{}', b'[1, 2', b'[1] 2', b'[{"a": }]', b'[1 2]',
+                    b'[,1]', b'[1],', b'[1,]', b'[1,,2]', b'[1x]',
+                    b'[tru]']:
+        try:
+            list(iter_json_array([invalid]))
+        except ValueError as error:
+            print('{!r}: {}'.format(invalid, error))
+        else:
+            assert False, invalid
+
+def _test_fails_mid_stream():
+    # 无效的标记立即出错，不再读取后面的块。
+    def _chunks():
+        yield b'[{"id": 1}, {"id": 2} {"id": 3}, '
+        raise AssertionError('read past the error')
+    records = []
+    try:
+        for record in iter_json_array(_chunks()):
+            records.append(record)
+    except ValueError:
+        pass
+    else:
+        assert False
+    assert records == [{'id': 1}, {'id': 2}]
+
+def run_tests():
+    '运行增量JSON数组解析测试。'
+    _test_chunk_boundaries()
+    _test_invalid()
+    _test_fails_mid_stream()
+
+if __name__ == '__main__':
+    run_tests()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：Prometheus指标'''
+
+from __future__ import print_function
+import os
+import time
+import shutil
+import tempfile
+from plugin_tools import app, device, metrics, sessions, trace
+from plugin_api import no_plugin_api
+
+class MockResponse(object):
+    'Mocked requests response class.'
+    status_code = 200
+    content = b'[]'
+    headers = {}
+
+    def json(self):
+        'Decode the body.'
+        return []
+
+def _get_info():
+    return {'url': 'http://localhost/api/', 'token': 'token'}
+
+def _test_render():
+    registry = metrics.Registry()
+    counter = registry.counter('test_total', 'Test counter.', ['name'])
+    histogram = registry.histogram('test_seconds', 'Test histogram.',
+                                   buckets=[0.1, 1])
+    counter.inc(name='a "quoted"\nname')
+    counter.inc(2, name='b')
+    for value in [0.05, 0.5, 5]:
+        histogram.observe(value)
+    registry.add_collector(lambda: [
+        ('test_gauge', 'gauge', 'Test gauge.', [], [((), 1.5)])])
+    lines = registry.render().splitlines()
+    assert '# TYPE test_total counter' in lines
+    assert 'test_total{name="a \\"quoted\\"\\nname"} 1' in lines
+    assert 'test_total{name="b"} 2' in lines
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{le="1"} 2' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'test_seconds_count 3' in lines
+    assert 'test_seconds_sum 5.55' in lines
+    assert 'test_gauge 1.5' in lines
+
+def _test_exporter(directory):
+    original = sessions.request
+    sessions.request = lambda method, url, **kwargs: MockResponse()
+    path = metrics.start(directory, interval=0.05, name='test.prom')
+    try:
+        app.get('points', get_info=_get_info)
+        app.get('points', get_info=_get_info)
+        device.log('metrics test')
+        with trace.span('device.state_read', path=''):
+            pass
+        time.sleep(0.2)
+        assert os.path.exists(path)
+        metrics.stop()
+        app.get('tools', get_info=_get_info)  # 停止后不再计数
+    finally:
+        metrics.stop()
+        sessions.request = original
+    assert metrics.APP_REQUESTS.value(
+        method='GET', endpoint='points', status=200) == 2
+    assert metrics.APP_REQUEST_SECONDS.count(method='GET', endpoint='points') == 2
+    assert metrics.RPCS.value(kind='send_message', outcome='offline') == 1
+    assert metrics.STATE_READS.value(outcome='ok') == 1
+    with open(path) as metrics_file:
+        text = metrics_file.read()
+    assert ('plugin_tools_app_requests_total'
+            '{method="GET",endpoint="points",status="200"} 2') in text
+    assert 'plugin_tools_cache_events_total{event="hits"}' in text
+    assert 'plugin_tools_scheduler_events_total{event="requests"}' in text
+    assert [name for name in os.listdir(directory)] == ['test.prom']
+    assert metrics.APP_REQUESTS.value(
+        method='GET', endpoint='tools', status=200) == 0
+    print(text.split('\n# HELP')[0])
+
+def _test_v1_state_reads():
+    # v1设备：`get_bot_state`的HTTP请求也计为状态读取。
+    original = device._TRANSPORT
+    device._TRANSPORT = device._TRANSPORTS['v1']
+    before = metrics.STATE_READS.value(outcome='ok')
+    trace.add_listener(metrics.record_span)
+    try:
+        device.get_bot_state()
+    finally:
+        trace.remove_listener(metrics.record_span)
+        device._TRANSPORT = original
+    assert metrics.STATE_READS.value(outcome='ok') == before + 1
+
+def _test_default_name():
+    name = metrics.default_name()
+    assert name.startswith('plugin_tools_') and name.endswith(
+        '_{}.prom'.format(os.getpid())), name
+
+def run_tests():
+    '运行指标测试。'
+    directory = tempfile.mkdtemp()
+    try:
+        _test_render()
+        with no_plugin_api():  # 没有设备插件API：命令结果为 offline
+            _test_exporter(directory)
+            _test_v1_state_reads()
+        _test_default_name()
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    run_tests()
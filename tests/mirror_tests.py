@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：Web应用本地镜像'''
+
+from __future__ import print_function
+import time
+from plugin_tools import app
+from plugin_tools.mirror import Mirror
+
+def _get_info():
+    return {'url': 'http://localhost/api/', 'token': 'token'}
+
+def _points(count):
+    return [{'id': i, 'pointer_type': 'Plant' if i % 2 else 'GenericPointer',
+             'name': 'point {}'.format(i), 'x': i % 100 * 10,
+             'y': i // 100 * 10, 'plant_stage': 'planned',
+             'planting_slug': 'mint' if i % 3 else 'basil',
+             'meta': {'color': 'red' if i % 5 else 'blue'},
+             'updated_at': '2024-01-01T00:00:00.000Z'}
+            for i in range(count)]
+
+class MockServer(object):
+    'Mocked app.get.'
+    def __init__(self, records):
+        self.records = records
+        self.calls = 0
+
+    def get(self, endpoint, return_dict=False, get_info=None):
+        'Return the records for the endpoint.'
+        self.calls += 1
+        return {'json': self.records.get(endpoint, []), 'status_code': 200}
+
+def _test_sync():
+    points = _points(1000)
+    server = MockServer({'points': points, 'sequences': [
+        {'id': 1, 'name': 'water', 'updated_at': 'a'}]})
+    original = app.get
+    app.get = server.get
+    try:
+        mirror = Mirror(':memory:', get_info=_get_info)
+        assert mirror.sync() == {'points': 1000, 'sequences': 1, 'tools': 0}
+        assert mirror.sync(['points']) == {'points': 0}  # 没有变化
+        points[3] = dict(points[3], name='changed', updated_at='b')
+        del points[4]
+        assert mirror.sync(['points']) == {'points': 2}
+        assert mirror.get('points', 3)['name'] == 'changed'
+        assert mirror.get('points', 4) is None
+        assert mirror.find_by_name('sequences', 'water')[0]['id'] == 1
+        calls = server.calls
+        mirror.search_points({'pointer_type': 'Plant'})
+        assert server.calls == calls  # 数据未过期：不请求
+    finally:
+        app.get = original
+    mirror.close()
+
+def _test_search():
+    mirror = Mirror(':memory:', get_info=_get_info, max_age=None)
+    points = _points(10000)
+    mirror.store('points', points)
+    search_payload = {'pointer_type': 'Plant', 'planting_slug': 'basil',
+                      'meta': {'color': 'blue'}}
+    expected = [p for p in points if p['pointer_type'] == 'Plant'
+                and p['planting_slug'] == 'basil'
+                and p['meta']['color'] == 'blue']
+    start = time.time()
+    found = mirror.search_points(search_payload)
+    elapsed = time.time() - start
+    assert found == expected
+    in_box = mirror.points_in_box(0, 0, 50, 20, {'pointer_type': 'Plant'})
+    assert [p['id'] for p in in_box] == [1, 3, 5, 101, 103, 105, 201, 203, 205]
+    print('searched {} points in {:.4f}s ({} found)'.format(
+        len(points), elapsed, len(found)))
+    for call in [lambda: mirror.get('points; DROP TABLE points'),
+                 lambda: mirror.store('logs', []),
+                 lambda: mirror.sync(['points', 'logs'])]:
+        try:
+            call()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('unknown resource accepted')
+    assert len(mirror.get('points')) == len(points)
+    mirror.close()
+
+def run_tests():
+    '运行本地镜像测试。'
+    _test_sync()
+    _test_search()
+
+if __name__ == '__main__':
+    run_tests()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：在没有设备插件API的环境中运行'''
+
+import os
+from contextlib import contextmanager
+
+PLUGIN_API_VARIABLES = ['PLUGIN_URL', 'PLUGIN_TOKEN']
+
+def environment_without_plugin_api(environment=None):
+    '''删除设备插件API（v1）变量后的环境变量副本。'''
+    environment = dict(os.environ if environment is None else environment)
+    for name in PLUGIN_API_VARIABLES:
+        environment.pop(name, None)
+    return environment
+
+@contextmanager
+def no_plugin_api():
+    '''暂时删除设备插件API（v1）变量：命令只打印，不发送。
+
+    其他测试（例如 device_requests_tests）可能已经设置了这些变量。
+    '''
+    saved = dict((name, os.environ.pop(name))
+                 for name in PLUGIN_API_VARIABLES if name in os.environ)
+    try:
+        yield
+    finally:
+        os.environ.update(saved)
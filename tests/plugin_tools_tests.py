@@ -368,6 +368,8 @@ if __name__ == '__main__':
         device_state_tests.run_position_tests()
         _print_header('device.get_pin_value():')
         device_state_tests.run_pin_value_tests()
+        _print_header('device.read_pins():')
+        device_state_tests.run_pin_values_tests()
 
         import device_requests_tests
         _print_header('device requests tests:')
@@ -376,5 +378,77 @@ if __name__ == '__main__':
         _print_header('env.Env().lsos_at_least():')
         import env_tests
         env_tests.run_tests()
+
+        _print_header('plugin_tools public names:')
+        import public_api_tests
+        public_api_tests.run_tests()
+
+        _print_header('waypoints.plan_route():')
+        import waypoints_tests
+        waypoints_tests.run_tests()
+
+        _print_header('batch command builders:')
+        import batch_tests
+        batch_tests.run_tests()
+
+        _print_header('sampler.Sampler():')
+        import sampler_tests
+        sampler_tests.run_tests()
+
+        _print_header('history.SensorHistory():')
+        import history_tests
+        history_tests.run_tests()
+
+        _print_header('app response cache:')
+        import cache_tests
+        cache_tests.run_tests()
+
+        _print_header('app.SequenceIndex():')
+        import sequence_index_tests
+        sequence_index_tests.run_tests()
+
+        _print_header('spatial.PointIndex():')
+        import spatial_tests
+        spatial_tests.run_tests()
+
+        _print_header('async_app:')
+        import async_app_tests
+        async_app_tests.run_tests()
+
+        _print_header('streaming JSON:')
+        import json_stream_tests
+        json_stream_tests.run_tests()
+
+        _print_header('app request scheduler:')
+        import scheduler_tests
+        scheduler_tests.run_tests()
+
+        _print_header('mirror.Mirror():')
+        import mirror_tests
+        mirror_tests.run_tests()
+
+        _print_header('spool.WriteBehindQueue():')
+        import spool_tests
+        spool_tests.run_tests()
+
+        _print_header('app client (local server):')
+        import app_server_tests
+        app_server_tests.run_tests()
+
+        _print_header('import time:')
+        import import_time_tests
+        import_time_tests.run_tests()
+
+        _print_header('worker.WorkerHost():')
+        import worker_tests
+        worker_tests.run_tests()
+
+        _print_header('trace spans:')
+        import trace_tests
+        trace_tests.run_tests()
+
+        _print_header('Prometheus metrics:')
+        import metrics_tests
+        metrics_tests.run_tests()
     print()
     print('测试完成。')
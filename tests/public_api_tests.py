@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：公共名称'''
+
+from __future__ import print_function
+import sys
+import types
+import importlib
+import plugin_tools
+
+# `plugin_tools`一直提供的名称（子模块按需导入）。
+PUBLIC_NAMES = ['log', 'get_bot_state', 'set_user_env', 'request',
+                'snake_case', 'Env', 'VERSION', '__version__',
+                'get_config_value']
+PUBLIC_MODULES = ['app', 'auxiliary', 'device', 'env']
+
+def _test_imports():
+    from plugin_tools import (log, get_bot_state, set_user_env, request,
+                              snake_case, Env, VERSION, __version__,
+                              get_config_value)
+    from plugin_tools.env import Env as EnvClass
+    assert Env is EnvClass
+    assert VERSION == __version__
+    assert all(callable(f) for f in [log, get_bot_state, set_user_env,
+                                     request, snake_case, get_config_value])
+
+def _test_attributes():
+    for name in PUBLIC_NAMES:
+        assert name in dir(plugin_tools), name
+        getattr(plugin_tools, name)
+    for name in PUBLIC_MODULES:
+        assert isinstance(getattr(plugin_tools, name), types.ModuleType), name
+    print('public names: {}'.format(', '.join(PUBLIC_NAMES + PUBLIC_MODULES)))
+
+NUMPY_MODULES = ['batch', 'history', 'sampler', 'spatial', 'waypoints']
+
+def _test_without_numpy():
+    # NumPy是可选依赖：没有安装时导入这些模块给出明确的错误。
+    saved = dict((name, sys.modules.pop(name)) for name in list(sys.modules)
+                 if name == 'numpy' or name.startswith('numpy.')
+                 or name in ['plugin_tools.' + m for m in NUMPY_MODULES])
+    sys.modules['numpy'] = None
+    try:
+        for name in NUMPY_MODULES:
+            try:
+                importlib.import_module('plugin_tools.' + name)
+            except ImportError as error:
+                assert 'plugin_tools.{} requires NumPy'.format(name) in str(
+                    error), error
+            else:
+                raise AssertionError(name)
+    finally:
+        del sys.modules['numpy']
+        sys.modules.update(saved)
+
+def run_tests():
+    '运行公共名称测试。'
+    _test_imports()
+    _test_attributes()
+    _test_without_numpy()
+
+if __name__ == '__main__':
+    run_tests()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：传感器采样'''
+
+from __future__ import print_function
+import time
+from plugin_tools.sampler import RingBuffer, Sampler
+from plugin_api import no_plugin_api
+
+def _test_ring_buffer():
+    ring = RingBuffer(4, 1)
+    for i in range(6):
+        ring.append(i, [i * 10])
+    timestamps, values = ring.window()
+    assert list(timestamps) == [2, 3, 4, 5]
+    assert list(values[:, 0]) == [20, 30, 40, 50]
+    timestamps, _ = ring.window(samples=2)
+    assert list(timestamps) == [4, 5]
+    timestamps, _ = ring.window(seconds=1)
+    assert list(timestamps) == [4, 5]
+    print('ring buffer window {}'.format(values[:, 0].tolist()))
+
+def _test_aggregates():
+    readings = iter(range(1, 101))
+    def _read(pins, pin_mode):
+        value = next(readings)
+        return {'timestamp': float(value),
+                'values': {pins[0]: str(value), pins[1]: None}}
+    sampler = Sampler([54, 55], rate=1000, capacity=10, _read=_read)
+    sampler.run(samples=20)
+    assert sampler.buffer.count == 10
+    assert sampler.mean() == {54: 15.5, 55: None}
+    assert sampler.minimum(samples=3) == {54: 18.0, 55: None}
+    assert sampler.maximum(seconds=2) == {54: 20.0, 55: None}
+    assert sampler.percentile(50)[54] == 15.5
+    assert sampler.ewma(alpha=1)[54] == 20.0
+    assert 15.5 < sampler.ewma(alpha=0.5)[54] < 20
+    print('aggregates: {}'.format(sampler.mean()))
+
+def _test_overruns():
+    def _slow_read(pins, pin_mode):
+        time.sleep(0.02)
+        return {'timestamp': time.time(), 'values': {pins[0]: 1}}
+    sampler = Sampler([54], rate=200, _read=_slow_read)
+    sampler.run(samples=5)
+    status = sampler.status()
+    assert status['overruns'] >= 4, status
+    assert not status['sustained']
+    print('status: {}'.format(status))
+
+def _test_misses_and_stop():
+    readings = iter([None, {'timestamp': 1.0, 'values': {54: 1}}, None,
+                     {'timestamp': 2.0, 'values': {54: 2}}])
+    sampler = Sampler([54], rate=1000, _read=lambda pins, pin_mode: next(
+        readings))
+    sampler.run(samples=2)  # 读取失败不计入采样数
+    assert sampler.buffer.count == 2
+    assert sampler.status()['misses'] == 2
+    # 线程开始之前调用的`stop()`仍然有效。
+    sampler = Sampler([54], rate=1000, _read=lambda pins, pin_mode: None)
+    sampler.start()
+    sampler.stop()
+    assert sampler._thread is None
+
+def run_tests():
+    '运行传感器采样测试。'
+    with no_plugin_api():
+        _test_ring_buffer()
+        _test_aggregates()
+        _test_overruns()
+        _test_misses_and_stop()
+
+if __name__ == '__main__':
+    run_tests()
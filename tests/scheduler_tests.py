@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：Web应用请求调度'''
+
+from __future__ import print_function
+import time
+import threading
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from plugin_tools.scheduler import RequestScheduler, TokenBucket
+
+class MockResponse(object):
+    'Mocked requests response class.'
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        'Release the connection.'
+
+class MockServer(object):
+    'Return the queued responses in order.'
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        'Mocked sessions.request.'
+        with self._lock:
+            self.calls.append(method)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            response = self.responses.pop(0) if self.responses else 200
+        time.sleep(0.01)
+        with self._lock:
+            self.active -= 1
+        if isinstance(response, Exception):
+            raise response
+        if isinstance(response, tuple):
+            return MockResponse(*response)
+        return MockResponse(response)
+
+def _test_retries():
+    scheduler = RequestScheduler(backoff=0.01)
+    server = MockServer([503, (429, {'Retry-After': '0.05'}), 200])
+    start = time.time()
+    response = scheduler.send(server.request, 'GET', 'url')
+    assert response.status_code == 200
+    assert server.calls == ['GET'] * 3
+    assert time.time() - start >= 0.05
+    assert scheduler.stats()['retries'] == 2
+    assert scheduler.stats()['throttled'] == 1
+    # POST：只在429（服务器未处理请求）时重试。
+    server = MockServer([503, 200])
+    assert scheduler.send(server.request, 'POST', 'url').status_code == 503
+    server = MockServer([429, 200])
+    assert scheduler.send(server.request, 'POST', 'url').status_code == 200
+    server = MockServer([RequestsConnectionError(), 200])
+    assert scheduler.send(server.request, 'GET', 'url').status_code == 200
+    server = MockServer([RequestsConnectionError(), 200])
+    try:
+        scheduler.send(server.request, 'POST', 'url')
+    except RequestsConnectionError:
+        pass
+    else:
+        raise AssertionError('POST connection errors should not be retried.')
+    scheduler.configure(max_retries=1, backoff=0.01)
+    server = MockServer([503, 503, 200])
+    assert scheduler.send(server.request, 'GET', 'url').status_code == 503
+    print('scheduler stats: {}'.format(scheduler.stats()))
+
+def _test_pacing():
+    bucket = TokenBucket(rate=100, burst=5)
+    start = time.time()
+    for _ in range(15):
+        bucket.acquire()
+    elapsed = time.time() - start
+    assert 0.08 < elapsed < 0.5, elapsed
+    print('paced 15 requests in {:.2f}s'.format(elapsed))
+
+def _test_rate_adjustment():
+    scheduler = RequestScheduler(rate=20, backoff=0.01, max_backoff=0.1)
+    sent_at = time.time()
+    scheduler._throttled(0, sent_at)
+    assert scheduler.stats()['rate'] == 10
+    # 同一拥塞窗口中的其他429不再减速。
+    scheduler._throttled(0, sent_at)
+    assert scheduler.stats()['rate'] == 10
+    scheduler._succeeded()
+    assert scheduler.stats()['rate'] == 11  # 每秒约恢复上限的一半
+    scheduler._throttled(0, time.time())
+    assert scheduler.stats()['rate'] == 5.5
+    # 速率不低于服务器最近接受的请求速率。
+    scheduler = RequestScheduler(rate=40)
+    for _ in range(30):
+        scheduler._succeeded()
+    scheduler._throttled(0, time.time())
+    assert scheduler.stats()['rate'] == 30
+    # `Retry-After`暂停不超过`max_backoff`。
+    scheduler = RequestScheduler(max_backoff=0.1)
+    scheduler._throttled(3600, time.time())
+    assert scheduler.bucket._paused_until - time.time() <= 0.1
+
+def _test_concurrency():
+    scheduler = RequestScheduler(max_concurrency=3)
+    server = MockServer([])
+    threads = [threading.Thread(target=scheduler.send,
+                                args=(server.request, 'GET', 'url'))
+               for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(server.calls) == 12
+    assert server.max_active <= 3, server.max_active
+    print('max concurrent requests: {}'.format(server.max_active))
+
+def run_tests():
+    '运行请求调度测试。'
+    _test_retries()
+    _test_pacing()
+    _test_rate_adjustment()
+    _test_concurrency()
+
+if __name__ == '__main__':
+    run_tests()
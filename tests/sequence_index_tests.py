@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：序列名称索引（本地替代服务器）'''
+
+from __future__ import print_function
+from plugin_tools import app, sessions
+from app_server import AppServer
+
+def _ids(found):
+    return sorted(f['id'] for f in found)
+
+def _test_lookup(server):
+    index = app.SequenceIndex(server.get_info)
+    ids = dict((s['name'], s['id']) for s in app.get(
+        'sequences', get_info=server.get_info))
+    assert index.by_name('sequence 3') == ids['sequence 3']
+    assert index.by_id(ids['sequence 3']) == 'sequence 3'
+    assert _ids(index.find('SEQUENCE 3')) == [ids['sequence 3']]
+    assert index.find('SEQUENCE 3', ignore_case=False) == []
+    assert _ids(index.find('Sequence 1', prefix=True)) == sorted(
+        ids['sequence {}'.format(i)] for i in [1] + list(range(10, 12)))
+    assert index.find('Sequence 1', prefix=True, ignore_case=False) == []
+    assert index.by_name('missing') is None
+    assert index.by_id(-1) is None
+    assert index.find('missing', prefix=True) == []
+
+def _test_refresh(server):
+    index = app.get_sequence_index(server.get_info)
+    _id = index.by_name('sequence 5')
+    requests = server.count('GET', 'sequences')
+    assert index.by_name('sequence 5') == _id  # 已加载：不请求
+    assert server.count('GET', 'sequences') == requests
+    server.update('sequences', _id, {'name': 'Watering'})  # 在Web应用中重命名
+    assert index.by_name('Watering') == _id  # 未找到：重新验证并刷新
+    assert index.by_name('sequence 5') is None
+    assert _ids(index.find('watering')) == [_id]
+    assert app.find_sequence_by_name('Watering',
+                                     get_info=server.get_info) == _id
+    assert app.find_sequence_by_name('sequence 5',
+                                     get_info=server.get_info) is None
+    app.delete('sequences', _id, get_info=server.get_info)
+    index.refresh()
+    assert index.by_id(_id) is None
+    assert index.find('watering') == []
+
+def _test_duplicates(server):
+    first = app.post('sequences', {'name': 'dup', 'body': []},
+                     get_info=server.get_info)['id']
+    second = app.post('sequences', {'name': 'Dup', 'body': []},
+                      get_info=server.get_info)['id']
+    third = app.post('sequences', {'name': 'dup', 'body': []},
+                     get_info=server.get_info)['id']
+    index = app.get_sequence_index(server.get_info)
+    # 与之前相同：重名时返回列表中最后一个。
+    assert index.by_name('dup') == third
+    assert _ids(index.find('DUP')) == sorted([first, second, third])
+    app.delete('sequences', third, get_info=server.get_info)
+    index.refresh()
+    assert index.by_name('dup') == first
+    print('duplicate names resolve to the last id')
+
+def run_tests():
+    '运行序列索引测试。'
+    with AppServer(sequences=12) as server:
+        try:
+            _test_lookup(server)
+            _test_refresh(server)
+            _test_duplicates(server)
+        finally:
+            sessions.close()
+
+if __name__ == '__main__':
+    run_tests()
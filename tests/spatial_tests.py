@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：点的空间索引'''
+
+from __future__ import print_function
+import time
+import numpy as np
+from plugin_tools import app, sessions
+from plugin_tools.spatial import PointIndex
+from app_server import AppServer
+
+XY = np.random.RandomState(1).uniform(0, 3000, size=(20000, 2))
+POINTS = [{'id': i, 'x': x, 'y': y} for i, (x, y) in enumerate(XY.tolist())]
+
+def _brute_force(x, y):
+    distance = np.hypot(XY[:, 0] - x, XY[:, 1] - y)
+    return distance, np.argsort(distance, kind='stable')
+
+def _test_queries(index):
+    for x, y in [(1500, 1500), (0, 0), (-800, 4000), (2999, 10)]:
+        distance, order = _brute_force(x, y)
+        nearest = [p['id'] for p in index.nearest(x, y, k=5)]
+        assert nearest == order[:5].tolist(), (x, y, nearest)
+        within = [p['id'] for p in index.within(x, y, 50)]
+        assert within == [i for i in order.tolist() if distance[i] <= 50]
+    box = [p['id'] for p in index.in_box(100, 200, 400, 250)]
+    inside = (XY[:, 0] >= 100) & (XY[:, 0] <= 400) \
+        & (XY[:, 1] >= 200) & (XY[:, 1] <= 250)
+    assert box == np.nonzero(inside)[0].tolist()
+    print('queries match brute force ({} points)'.format(len(index)))
+
+def _test_updates(index):
+    [nearest] = index.nearest(10, 10)
+    index.remove(nearest['id'])
+    assert index.nearest(10, 10)[0]['id'] != nearest['id']
+    index.add({'id': 'new', 'x': 10, 'y': 10})
+    assert index.nearest(10, 10)[0]['id'] == 'new'
+    index.update({'id': 'new', 'x': 2000, 'y': 2000})
+    assert index.within(10, 10, 1) == []
+    assert len(index) == len(POINTS)
+    index.add(nearest)
+    print('incremental updates ok')
+
+def _test_delete():
+    with AppServer(points=5) as server:
+        try:
+            index = PointIndex(app.get('points', get_info=server.get_info))
+            _id = index.nearest(0, 0)[0]['id']
+            index.delete(_id, get_info=server.get_info)
+            assert len(index) == 4
+            assert _id not in server.data['points']
+            # 服务器拒绝时（404）点保留在索引中，与服务器一致。
+            index.add({'id': 999, 'x': 0, 'y': 0})
+            response = index.delete(999, get_info=server.get_info)
+            assert 'error' in response, response
+            assert index.nearest(0, 0)[0]['id'] == 999
+            assert len(index) == 5
+        finally:
+            sessions.close()
+    print('delete keeps the index in sync with the server')
+
+def run_tests():
+    '运行空间索引测试。'
+    begin = time.time()
+    index = PointIndex(POINTS)
+    print('indexed {} points in {:.3f}s'.format(len(index), time.time() - begin))
+    _test_queries(index)
+    _test_updates(index)
+    assert PointIndex().nearest(0, 0) == []
+    _test_delete()
+
+if __name__ == '__main__':
+    run_tests()
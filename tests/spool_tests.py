@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：Web应用后台写入队列'''
+
+from __future__ import print_function
+import os
+import time
+import shutil
+import tempfile
+import threading
+from plugin_tools import app, sessions
+from plugin_tools.spool import WriteBehindQueue
+
+class MockServer(object):
+    'Mocked app.request.'
+    def __init__(self, status_code=200, delay=0):
+        self.status_code = status_code
+        self.delay = delay
+        self.received = []
+
+    def request(self, method, endpoint, _id=None, payload=None,
+                return_dict=False, get_info=None):
+        'Record the request.'
+        time.sleep(self.delay)
+        if self.status_code == 200:
+            self.received.append((method, endpoint, _id, payload))
+        return {'json': payload, 'status_code': self.status_code}
+
+def _test_write_behind(directory):
+    server = MockServer(delay=0.01)
+    original = app.request
+    app.request = server.request
+    try:
+        queue = WriteBehindQueue(os.path.join(directory, 'spool.sqlite'))
+        start = time.time()
+        handles = [queue.log('message {}'.format(i)) for i in range(20)]
+        plant = queue.add_plant(10, 20, planting_slug='mint')
+        queue.patch('points', 1, {'name': 'plant'})
+        elapsed = time.time() - start
+        assert elapsed < 0.2, elapsed  # 不等待HTTP请求
+        assert queue.flush(5)
+        assert all(handle.done() for handle in handles)
+        assert plant.wait()['json']['planting_slug'] == 'mint'
+        assert [r[1] for r in server.received] == ['logs'] * 20 + [
+            'points', 'points']
+        assert len(queue) == 0
+        queue.close()
+    finally:
+        app.request = original
+    print('queued 22 requests in {:.4f}s'.format(elapsed))
+
+def _test_durability(directory):
+    path = os.path.join(directory, 'durable.sqlite')
+    server = MockServer(status_code=503)
+    original = app.request
+    app.request = server.request
+    try:
+        queue = WriteBehindQueue(path, retry_seconds=0.01)
+        queue.log('first')
+        queue.log('second')
+        assert not queue.flush(0.1)
+        queue.close(timeout=0)
+        server.status_code = 200
+        queue = WriteBehindQueue(path)  # 继续发送上次未发送的请求
+        assert queue.flush(5)
+        assert [r[3]['message'] for r in server.received] == [
+            'first', 'second']
+        queue.close()
+    finally:
+        app.request = original
+    print('resent {} requests after reopening'.format(len(server.received)))
+
+class _Crash(BaseException):
+    'Simulated process exit.'
+
+def _test_crash_mid_batch(directory):
+    # 发送第4个请求之前进程退出：重新打开时只发送未发送的请求。
+    path = os.path.join(directory, 'crash.sqlite')
+    server = MockServer()
+    def _request(*args, **kwargs):
+        if len(server.received) == 3:
+            raise _Crash()
+        return server.request(*args, **kwargs)
+    original, original_hook = app.request, threading.excepthook
+    app.request = _request
+    threading.excepthook = lambda args: None
+    try:
+        queue = WriteBehindQueue(path)
+        for i in range(5):
+            queue.add_plant(i, 0)
+        queue._worker.join(5)
+        queue.close(timeout=0)
+        app.request = server.request
+        queue = WriteBehindQueue(path)
+        assert queue.flush(5)
+        queue.close()
+    finally:
+        app.request, threading.excepthook = original, original_hook
+    assert [r[3]['x'] for r in server.received] == [0, 1, 2, 3, 4]
+
+class MockResponse(object):
+    'Mocked requests response class.'
+    status_code = 200
+    content = b'{}'
+    headers = {}
+
+    def json(self):
+        'Decode the body.'
+        return {}
+
+def _test_unsent(directory):
+    # `get_info`失败时`app.request`不发送请求（状态码 0）：请求保留在队列中。
+    available = []
+    def _get_info():
+        if not available:
+            raise KeyError('token')
+        return {'url': 'http://localhost/api/', 'token': 'token'}
+    sent = []
+    def _request(method, url, **kwargs):
+        sent.append((method, url))
+        return MockResponse()
+    original = sessions.request
+    sessions.request = _request
+    try:
+        queue = WriteBehindQueue(os.path.join(directory, 'unsent.sqlite'),
+                                 get_info=_get_info, retry_seconds=0.01)
+        handle = queue.log('important')
+        assert not queue.flush(0.1)
+        assert not handle.done() and len(queue) == 1
+        available.append(True)
+        assert queue.flush(5)
+        assert handle.wait()['status_code'] == 200
+        assert sent == [('POST', 'http://localhost/api/logs')]
+        assert len(queue) == 0
+        queue.close()
+    finally:
+        sessions.request = original
+
+def run_tests():
+    '运行后台写入队列测试。'
+    directory = tempfile.mkdtemp()
+    try:
+        _test_write_behind(directory)
+        _test_durability(directory)
+        _test_crash_mid_batch(directory)
+        _test_unsent(directory)
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    run_tests()
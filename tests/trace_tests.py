@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：跟踪跨度'''
+
+from __future__ import print_function
+import os
+import json
+import shutil
+import asyncio
+import tempfile
+import threading
+from plugin_tools import app, device, get_config_value, sessions, trace
+
+class MockResponse(object):
+    'Mocked requests response class.'
+    status_code = 200
+    content = b'{"id": 1}'
+
+    def json(self):
+        'Decode the body.'
+        return {'id': 1}
+
+def _get_info():
+    return {'url': 'http://localhost/api/', 'token': 'token'}
+
+def _test_spans():
+    original = sessions.request
+    sessions.request = lambda method, url, **kwargs: MockResponse()
+    trace.clear()
+    trace.enable()
+    try:
+        with trace.span('plugin.run', plugin='test') as run_span:
+            app.post('tools', {'name': 'tool'}, get_info=_get_info)
+            device.log('hi')
+            try:
+                get_config_value('plugin', 'input', _get_state=lambda: {})
+            except KeyError:
+                pass
+            run_span.set(result='ok')
+        thread = threading.Thread(target=lambda: trace.span('thread').__enter__())
+        thread.start()
+        thread.join()
+    finally:
+        trace.disable()
+        sessions.request = original
+    spans = dict((s.name, s) for s in trace.spans())
+    assert spans['app.request'].attributes == {
+        'method': 'POST', 'endpoint': 'tools', 'status': 200, 'bytes': 9}
+    assert spans['app.request'].parent == spans['plugin.run'].id
+    assert spans['device.send_celery_script'].attributes['kind'] == 'send_message'
+    assert spans['get_config_value'].parent == spans['plugin.run'].id
+    assert spans['get_config_value'].error == 'KeyError'
+    assert spans['plugin.run'].attributes['result'] == 'ok'
+    assert 'thread' not in spans  # 未结束的跨度不会记录
+    print('spans: {}'.format(sorted(spans)))
+
+def _test_tasks():
+    trace.clear()
+    trace.enable()
+    async def _task(name):
+        with trace.span(name):
+            await asyncio.sleep(0.01)
+            with trace.span(name + '.child'):
+                await asyncio.sleep(0.01)
+    async def _main():
+        await asyncio.gather(_task('a'), _task('b'))
+    try:
+        asyncio.run(_main())
+    finally:
+        trace.disable()
+    spans = dict((s.name, s) for s in trace.spans())
+    assert spans['a.child'].parent == spans['a'].id
+    assert spans['b.child'].parent == spans['b'].id
+
+def _test_listener_and_export(directory):
+    finished = []
+    trace.clear()
+    trace.add_listener(finished.append)
+    try:
+        with trace.span('listened'):
+            pass
+    finally:
+        trace.remove_listener(finished.append)
+    assert [s.name for s in finished] == ['listened']
+    assert trace.spans() == []  # 未启用：只通知监听器
+    with trace.span('ignored'):
+        pass
+    assert len(finished) == 1
+    trace.enable()
+    with trace.span('exported', count=1):
+        pass
+    trace.disable()
+    path = os.path.join(directory, 'trace.json')
+    assert trace.export(path) == 1
+    with open(path) as trace_file:
+        [event] = json.load(trace_file)['traceEvents']
+    assert event['ph'] == 'X' and event['name'] == 'exported'
+    assert event['args']['count'] == 1 and event['dur'] >= 0
+    print('exported event: {}'.format(event['name']))
+
+def run_tests():
+    '运行跟踪测试。'
+    directory = tempfile.mkdtemp()
+    try:
+        _test_spans()
+        _test_tasks()
+        _test_listener_and_export(directory)
+    finally:
+        shutil.rmtree(directory)
+        trace.clear()
+
+if __name__ == '__main__':
+    run_tests()
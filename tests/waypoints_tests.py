@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：路径点规划'''
+
+from __future__ import print_function
+import time
+import numpy as np
+from plugin_tools import waypoints
+
+def _test_small_route():
+    points = [{'x': 30, 'y': 0, 'z': 0}, {'x': 10, 'y': 0, 'z': 0},
+              {'x': 20, 'y': 0, 'z': None}]
+    order = waypoints.plan_route(points)
+    assert list(order) == [1, 2, 0], order
+    route = waypoints.plan_coordinates(points, safe_z=0, clearance_radius=10)
+    assert [c['args']['x'] for c in route] == [10, 20, 30]
+    route = waypoints.plan_coordinates(points, start=(0, 0, -50), safe_z=0)
+    assert len(route) == 9
+    assert route[0]['args'] == {'x': 0, 'y': 0, 'z': 0}
+    print('route: {}'.format([c['args']['x'] for c in route]))
+
+def _test_large_route():
+    points = np.random.RandomState(0).uniform(0, 3000, size=(5000, 2))
+    begin = time.time()
+    order = waypoints.plan_route(points)
+    elapsed = time.time() - begin
+    assert sorted(order) == list(range(5000))
+    given = waypoints.route_time(points, np.arange(5000))
+    planned = waypoints.route_time(points, order)
+    assert planned < given / 10, (planned, given)
+    assert elapsed < 1, elapsed
+    print('5000 points planned in {:.2f}s: {:.0f} -> {:.0f}'.format(
+        elapsed, given, planned))
+
+def run_tests():
+    '运行路径点规划测试。'
+    _test_small_route()
+    _test_large_route()
+
+if __name__ == '__main__':
+    run_tests()
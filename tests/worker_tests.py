@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# coding: utf-8
+'''插件工具测试：常驻插件工作进程'''
+
+from __future__ import print_function
+import os
+import sys
+import stat
+import time
+import shutil
+import tempfile
+import threading
+from plugin_tools import get_config_value, load_config, worker
+from plugin_api import no_plugin_api
+
+def _manifest(_plugin_name):
+    return {'config': [{'name': 'seconds', 'value': 1},
+                       {'name': 'label', 'value': ''}]}
+
+def _water():
+    config = load_config('Water Plugin', {'seconds': int},
+                         _get_manifest=_manifest)
+    print('watering for {} seconds'.format(config['seconds']))
+    return {'seconds': config['seconds'],
+            'label': get_config_value('Water Plugin', 'label', str,
+                                      _get_state=lambda: {}),
+            'token': os.getenv('LARSEN_API_TOKEN')}
+
+def _fail():
+    sys.exit(1)
+
+def _test_worker(directory):
+    host = worker.WorkerHost(os.path.join(directory, 'worker.sock'))
+    host.register('water', _water)
+    host.register('fail', _fail)
+    host.register('error', 'json:loads')
+    host.start()
+    thread = threading.Thread(target=host.serve_forever)
+    thread.start()
+    try:
+        response = worker.call(
+            'water', host.address, env={'LARSEN_API_TOKEN': 'token'},
+            plugin_name='Water Plugin', config={'seconds': 5, 'label': 'a'})
+        assert response['result'] == {'seconds': 5, 'label': 'a',
+                                      'token': 'token'}, response
+        assert 'watering for 5 seconds' in response['output'], response
+        # 配置和环境变量不会带到下一次运行。
+        response = worker.call('water', host.address,
+                               plugin_name='Water Plugin',
+                               config={'seconds': 10, 'label': 'b'})
+        assert response['result'] == {'seconds': 10, 'label': 'b',
+                                      'token': os.getenv('LARSEN_API_TOKEN')}
+        assert 'water_plugin_seconds' not in os.environ
+        assert worker.call('fail', host.address)['exit_code'] == 1
+        response = worker.call('error', host.address, kwargs={'s': '['})
+        assert 'JSONDecodeError' in response['error']
+        assert 'not registered' in worker.call('missing', host.address)['error']
+        start = time.time()
+        for _ in range(20):
+            worker.call('water', host.address, plugin_name='Water Plugin',
+                        config={'seconds': 1, 'label': 'c'})
+        elapsed = (time.time() - start) / 20
+    finally:
+        host.stop()
+        thread.join()
+    print('worker run: {:.2f} ms'.format(1000 * elapsed))
+
+def _test_security(directory):
+    original = worker.ENV.plugin_data_dir
+    worker.ENV.plugin_data_dir = directory
+    try:
+        host = worker.WorkerHost()
+    finally:
+        worker.ENV.plugin_data_dir = original
+    assert host.address == os.path.join(directory, 'plugin_worker.sock')
+    with open(host.address, 'w') as other_file:
+        other_file.write('not a socket')
+    try:
+        host.start()
+    except FileExistsError:
+        pass
+    else:
+        raise AssertionError('replaced a file that is not a socket')
+    os.remove(host.address)
+    host.start()
+    try:
+        assert stat.S_IMODE(os.stat(host.address).st_mode) == 0o600
+        host.register('water', _water)
+        for request in [['water'], {'entry': 'missing', 'env': {'A': '1'}},
+                        {'entry': 'water', 'env': ['A']}]:
+            assert host.handle(request)['error'], request
+            assert 'A' not in os.environ
+    finally:
+        host.stop()
+    host.start()  # 删除上次留下的套接字
+    host.stop()
+
+def run_tests():
+    '运行工作进程测试。'
+    directory = tempfile.mkdtemp()
+    try:
+        with no_plugin_api():
+            _test_worker(directory)
+            _test_security(directory)
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    run_tests()